@@ -0,0 +1,43 @@
+from ytb_clone.src.llm.answer_cache import AnswerCache
+
+
+def test_similar_question_of_same_video_hits():
+    cache = AnswerCache(threshold=0.9, path="")
+    cache.put("video", "What is this about?", [1.0, 0.0], "Cats")
+
+    assert cache.get("video", [0.99, 0.1]) == "Cats"
+    assert cache.get("video", [0.0, 1.0]) is None
+    assert cache.get("other", [1.0, 0.0]) is None
+    assert cache.stats() == {"size": 1, "hits": 1, "misses": 2}
+
+
+def test_ttl_and_size_eviction(monkeypatch):
+    cache = AnswerCache(max_size=2, ttl=60, threshold=0.9, path="")
+    cache.put("video", "a", [1.0, 0.0, 0.0], "A")
+    cache.put("video", "b", [0.0, 1.0, 0.0], "B")
+    cache.get("video", [1.0, 0.0, 0.0])
+    cache.put("video", "c", [0.0, 0.0, 1.0], "C")
+
+    assert cache.get("video", [0.0, 1.0, 0.0]) is None
+    assert cache.get("video", [1.0, 0.0, 0.0]) == "A"
+
+    now = cache.lru[cache.key("video", "c")][3]
+    monkeypatch.setattr("time.time", lambda: now + 61)
+
+    assert cache.get("video", [0.0, 0.0, 1.0]) is None
+    assert cache.stats()["size"] == 0
+
+
+def test_invalidate_persists(tmp_path):
+    path = str(tmp_path / "answers.db")
+    cache = AnswerCache(threshold=0.9, path=path)
+    cache.put("video", "a", [1.0, 0.0], "A")
+    cache.put("other", "a", [1.0, 0.0], "Other A")
+
+    assert AnswerCache(threshold=0.9, path=path).get("video", [1.0, 0.0]) == "A"
+
+    cache.invalidate("video")
+
+    reopened = AnswerCache(threshold=0.9, path=path)
+    assert reopened.get("video", [1.0, 0.0]) is None
+    assert reopened.get("other", [1.0, 0.0]) == "Other A"
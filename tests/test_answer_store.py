@@ -0,0 +1,54 @@
+import os
+
+import pytest
+
+for module in ("fastapi", "openai", "uvicorn", "dotenv"):
+    pytest.importorskip(module)
+
+# The OpenAI clients are created on import, no request is made here
+os.environ.setdefault("OPENAI_API_KEY", "test")
+
+from ytb_clone.src.api import app  # noqa: E402
+from ytb_clone.src.llm.answer_cache import AnswerCache  # noqa: E402
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = AnswerCache(threshold=0.9, path="")
+    monkeypatch.setattr(app, "get_answer_cache", lambda: cache)
+    return cache
+
+
+def test_answer_is_stored_with_the_lookup_embedding(cache, monkeypatch):
+    monkeypatch.setattr(app, "text_embedding", pytest.fail)
+
+    app.answer_store("video", "Why?", [1.0, 0.0])("Because")
+
+    assert cache.get("video", [1.0, 0.0]) == "Because"
+
+
+def test_answer_is_stored_after_a_failed_embedding(cache, monkeypatch):
+    calls = []
+
+    def embed(texts):
+        calls.append(texts)
+        return [[0.0, 1.0]]
+
+    monkeypatch.setattr(app, "text_embedding", embed)
+
+    # The lookup gave up on the embedding, the answer still gets cached
+    app.answer_store("video", "Why?", None)("Because")
+
+    assert calls == [["Why?"]]
+    assert cache.get("video", [0.0, 1.0]) == "Because"
+
+
+def test_answer_is_dropped_when_embedding_fails_again(cache, monkeypatch):
+    def embed(texts):
+        raise ConnectionError("timeout")
+
+    monkeypatch.setattr(app, "text_embedding", embed)
+
+    app.answer_store("video", "Why?", None)("Because")
+
+    assert cache.stats()["size"] == 0
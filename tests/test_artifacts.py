@@ -0,0 +1,52 @@
+import json
+import os
+
+from ytb_clone.src.api.artifacts import ArtifactCache, stage_key
+
+
+def test_stage_key_changes_with_settings():
+    key = stage_key("video", "frames", {"FRAME_FPS": 1})
+
+    assert key == stage_key("video", "frames", {"FRAME_FPS": 1})
+    assert key != stage_key("video", "frames", {"FRAME_FPS": 2})
+    assert key != stage_key("other", "frames", {"FRAME_FPS": 1})
+    assert key != stage_key("video", "texts", {"FRAME_FPS": 1})
+
+
+def test_completed_stages_resume_from_the_manifest(tmp_path):
+    cache = ArtifactCache("video", cache_dir=str(tmp_path), enabled=True)
+    cache.put("frames", "k1", {"count": 3})
+
+    resumed = ArtifactCache("video", cache_dir=str(tmp_path), enabled=True)
+
+    assert resumed.get("frames", "k1") == {"count": 3}
+    assert resumed.get("frames", "k2") is None
+    assert resumed.get("texts", "k1") is None
+
+
+def test_validate_rejects_stale_results(tmp_path):
+    cache = ArtifactCache("video", cache_dir=str(tmp_path), enabled=True)
+    cache.put("texts", "k", {"count": 3})
+
+    assert cache.get("texts", "k", validate=lambda result: result["count"] == 3)
+    assert cache.get("texts", "k", validate=lambda result: result["count"] == 2) is None
+
+
+def test_manifest_is_replaced_atomically(tmp_path):
+    cache = ArtifactCache("video", cache_dir=str(tmp_path), enabled=True)
+    cache.put("download", "k1", {"size": 1})
+    cache.put("frames", "k2", {"count": 2})
+
+    # Only the manifest is left, no temporary files
+    assert os.listdir(cache.dir) == ["manifest.json"]
+
+    with open(cache.path) as f:
+        assert set(json.load(f)) == {"download", "frames"}
+
+
+def test_disabled_cache_records_nothing(tmp_path):
+    cache = ArtifactCache("video", cache_dir=str(tmp_path), enabled=False)
+    cache.put("frames", "k", {"count": 1})
+
+    assert cache.get("frames", "k") is None
+    assert not os.path.exists(cache.path)
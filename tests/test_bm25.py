@@ -0,0 +1,71 @@
+import os
+
+import pytest
+
+from ytb_clone.src.retrieval.bm25 import BM25Index, build_index, get_index
+from ytb_clone.src.retrieval.fusion import reciprocal_rank_fusion
+
+TRANSCRIPT = [
+    {"start": 0, "end": 10, "text": "Welcome back to the channel"},
+    {"start": 10, "end": 20, "text": "Today we benchmark the RTX 4090 against the 3090"},
+    {"start": 20, "end": 30, "text": "The channel is about graphics cards and the GPU market"},
+    {"start": 30, "end": 40, "text": "Thanks for watching the channel"},
+]
+
+
+def segments(transcript):
+    return [{"start": i["start"], "end": i["end"], "data": i["text"]} for i in transcript]
+
+
+def test_exact_terms_rank_first():
+    index = BM25Index(segments(TRANSCRIPT))
+
+    [(score, best)] = index.search("How fast is the 4090?", limit=1)
+
+    assert best["start"] == 10
+    assert score > 0
+    assert index.search("unrelated words", limit=3) == []
+
+
+def test_rare_terms_outweigh_common_ones():
+    index = BM25Index(segments(TRANSCRIPT))
+
+    hits = index.search("channel GPU", limit=4)
+
+    assert hits[0][1]["start"] == 20
+    assert len(hits) == 3
+
+
+def test_index_reloads_after_reimport(tmp_path):
+    build_index(TRANSCRIPT, "video", index_dir=str(tmp_path))
+    index = get_index("video", index_dir=str(tmp_path))
+
+    assert get_index("video", index_dir=str(tmp_path)) is index
+    assert get_index("other", index_dir=str(tmp_path)) is None
+
+    build_index(TRANSCRIPT[:1], "video", index_dir=str(tmp_path))
+    path = tmp_path / "video.json"
+    os.utime(path, (1, 1))
+
+    assert len(get_index("video", index_dir=str(tmp_path)).documents) == 1
+
+
+def test_video_ids_cannot_leave_the_index_dir(tmp_path):
+    index_dir = str(tmp_path / "bm25")
+
+    with pytest.raises(ValueError):
+        build_index(TRANSCRIPT, "../video", index_dir=index_dir)
+
+    with pytest.raises(ValueError):
+        get_index("a/../../video", index_dir=index_dir)
+
+    assert not (tmp_path / "video.json").exists()
+
+
+def test_reciprocal_rank_fusion():
+    a, b, c, d = segments(TRANSCRIPT)
+
+    fused = reciprocal_rank_fusion([[a, b, c], [c, d, a]], limit=3, k=60)
+
+    assert fused == [a, c, b]
+    assert reciprocal_rank_fusion([[], [d]]) == [d]
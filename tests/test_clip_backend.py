@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+clip = pytest.importorskip("clip")
+pytest.importorskip("onnxruntime")
+
+from ytb_clone.src.embedding.backend import (  # noqa: E402
+    OnnxClipBackend,
+    TorchClipBackend,
+)
+
+
+def cosine(a, b):
+    a = a / np.linalg.norm(a, axis=1, keepdims=True)
+    b = b / np.linalg.norm(b, axis=1, keepdims=True)
+    return (a * b).sum(axis=1)
+
+
+@pytest.fixture(scope="module")
+def torch_backend():
+    model, preprocess = clip.load("ViT-B/32", device="cpu")
+    return TorchClipBackend(model, preprocess, "cpu")
+
+
+@pytest.fixture(scope="module")
+def inputs():
+    generator = torch.Generator().manual_seed(0)
+    images = torch.rand(4, 3, 224, 224, generator=generator)
+    tokens = clip.tokenize(["a man talking", "a slide with code", "a cat", ""])
+    return images, tokens
+
+
+@pytest.mark.parametrize(
+    "quantize, threshold", [(False, 0.999), (True, 0.95)]
+)
+def test_onnx_matches_torch(tmp_path_factory, torch_backend, inputs, quantize, threshold):
+    model_dir = tmp_path_factory.getbasetemp() / "onnx"
+    onnx_backend = OnnxClipBackend(
+        "ViT-B/32", quantize=quantize, model_dir=str(model_dir)
+    )
+    images, tokens = inputs
+
+    assert onnx_backend.dim == torch_backend.dim
+    assert (
+        cosine(onnx_backend.encode_image(images), torch_backend.encode_image(images))
+        > threshold
+    ).all()
+    assert (
+        cosine(onnx_backend.encode_text(tokens), torch_backend.encode_text(tokens))
+        > threshold
+    ).all()
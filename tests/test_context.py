@@ -0,0 +1,77 @@
+import os
+
+import pytest
+
+pytest.importorskip("tiktoken")
+pytest.importorskip("PIL")
+
+from PIL import Image  # noqa: E402
+
+from ytb_clone.src.llm import context  # noqa: E402
+from ytb_clone.src.llm.context import (  # noqa: E402
+    dedup_segments,
+    frame_tokens,
+    image_tokens,
+    pack_context,
+)
+
+
+def test_image_tokens():
+    assert image_tokens(512, 512) == 85 + 170
+    assert image_tokens(512, 288) == 85 + 170
+    # 2048x4096 -> 1024x2048 -> 768x1536: 2 x 3 tiles
+    assert image_tokens(2048, 4096) == 85 + 170 * 6
+
+
+def test_frame_tokens_use_thumbnail_size(tmp_path):
+    frame = tmp_path / "images" / "video" / "frame0001.png"
+    frame.parent.mkdir(parents=True)
+    Image.new("RGB", (1280, 720)).save(frame)
+
+    assert frame_tokens(str(frame)) == image_tokens(512, 288)
+
+    # Re-imported in place with another size
+    Image.new("RGB", (720, 1280)).save(frame)
+    os.utime(frame, (1, 1))
+
+    assert frame_tokens(str(frame)) == image_tokens(288, 512)
+
+
+def test_dedup_segments_merges_frames_into_better_ranked():
+    related_texts = {
+        "a": {"start": 0, "end": 10, "frames": ["f1"]},
+        "b": {"start": 2, "end": 8, "frames": ["f1", "f2"]},
+        "c": {"start": 9, "end": 20, "frames": []},
+    }
+
+    kept = dedup_segments(related_texts, threshold=0.5)
+
+    assert list(kept) == ["a", "c"]
+    assert kept["a"]["frames"] == ["f1", "f2"]
+    assert related_texts["a"]["frames"] == ["f1"]
+
+
+def test_pack_context_drops_what_does_not_fit(monkeypatch):
+    try:
+        context.get_encoding()
+    except Exception:
+        pytest.skip("cl100k_base encoding is not available offline")
+
+    monkeypatch.setattr(context, "frame_tokens", lambda frame: 100)
+
+    related_texts = {
+        "first segment": {"start": 0, "end": 10, "frames": ["f1", "f2"]},
+        "second segment": {"start": 20, "end": 30, "frames": []},
+    }
+
+    packed, images, report = pack_context(
+        related_texts, ["f3"], lambda text, item: text, budget=110
+    )
+
+    assert packed == {
+        "first segment": {"start": 0, "end": 10, "frames": ["f1"]},
+        "second segment": {"start": 20, "end": 30, "frames": []},
+    }
+    assert images == []
+    assert report["dropped_frames"] == ["f2", "f3"]
+    assert report["used"] <= 110
@@ -0,0 +1,54 @@
+import pytest
+
+pytest.importorskip("cv2")
+
+import numpy as np  # noqa: E402
+
+from ytb_clone.src.fetch.dedup import dedup_frames, dhash, hamming  # noqa: E402
+
+
+def gradient(horizontal):
+    ramp = np.tile(np.arange(0, 256, 4, dtype=np.uint8), (64, 1))
+    return ramp if horizontal else ramp[:, ::-1].copy()
+
+
+def test_similar_frames_share_a_hash():
+    image = gradient(True)
+    noisy = np.clip(image.astype(int) + 1, 0, 255).astype(np.uint8)
+
+    assert hamming(dhash(image), dhash(noisy)) == 0
+    assert hamming(dhash(image), dhash(gradient(False))) == 64
+
+
+def test_kept_frames_span_until_the_next_change():
+    a, b = gradient(True), gradient(False)
+    frames = [
+        (second, image, f"frame{second}")
+        for second, image in enumerate([a, a, a, b, b, a, a])
+    ]
+
+    assert list(dedup_frames(frames, threshold=0, interval=1)) == [
+        (0, 3, "frame0"),
+        (3, 5, "frame3"),
+        (5, 7, "frame5"),
+    ]
+
+
+def test_threshold_controls_what_counts_as_duplicate():
+    a, b = gradient(True), gradient(False)
+    frames = [(0, a, "frame0"), (1, b, "frame1")]
+
+    assert len(list(dedup_frames(frames, threshold=0, interval=1))) == 2
+    assert list(dedup_frames(frames, threshold=64, interval=1)) == [(0, 2, "frame0")]
+    assert list(dedup_frames([], threshold=0)) == []
+
+
+def test_last_span_covers_a_sub_second_interval():
+    a, b = gradient(True), gradient(False)
+    # Two frames per second, both sampled frames of a second share it
+    frames = [(0, a, "frame0"), (0, a, "frame0b"), (1, b, "frame1"), (1, b, "frame1b")]
+
+    assert list(dedup_frames(frames, threshold=0, interval=0.5)) == [
+        (0, 1, "frame0"),
+        (1, 1.5, "frame1"),
+    ]
@@ -0,0 +1,70 @@
+import asyncio
+
+import numpy as np
+
+from ytb_clone.src.embedding.cache import (
+    EmbeddingCache,
+    async_cached_embedding,
+    cached_embedding,
+    caches,
+)
+
+
+def fake_embedding(calls):
+    def embed(texts):
+        calls.append(list(texts))
+        return [[float(len(text)), 1.0] for text in texts]
+
+    return embed
+
+
+def test_lru_evicts_least_recently_used():
+    cache = EmbeddingCache("test", max_size=2, path="")
+
+    cache.put_many(["a", "b"], [[1.0], [2.0]])
+    cache.get_many(["a"])
+    cache.put_many(["c"], [[3.0]])
+
+    a, b, c = cache.get_many(["a", "b", "c"])
+
+    assert (a.tolist(), b, c.tolist()) == ([1.0], None, [3.0])
+    assert a.dtype == np.float32
+    assert cache.stats()["misses"] == 1
+
+
+def test_disk_store_survives_new_process(tmp_path):
+    path = str(tmp_path / "embeddings.db")
+
+    EmbeddingCache("test", path=path).put_many(["hello"], [[0.5, 0.25]])
+    cache = EmbeddingCache("test", path=path)
+
+    assert cache.get_many(["hello"])[0].tolist() == [0.5, 0.25]
+    assert cache.stats()["disk_hits"] == 1
+    assert EmbeddingCache("other", path=path).get_many(["hello"]) == [None]
+
+
+def test_cached_embedding_only_computes_misses(monkeypatch):
+    calls = []
+    model = "test-decorator"
+    monkeypatch.setitem(caches, model, EmbeddingCache(model, path=""))
+    embed = cached_embedding(model)(fake_embedding(calls))
+
+    assert embed(["ab", "abc", "ab"]) == [[2.0, 1.0], [3.0, 1.0], [2.0, 1.0]]
+    assert embed(["abc", "abcd"]) == [[3.0, 1.0], [4.0, 1.0]]
+    assert calls == [["ab", "abc"], ["abcd"]]
+
+
+def test_async_cached_embedding_only_computes_misses(monkeypatch):
+    calls = []
+    model = "test-async-decorator"
+    monkeypatch.setitem(caches, model, EmbeddingCache(model, path=""))
+    embed = fake_embedding(calls)
+
+    async def aembed(texts):
+        return embed(texts)
+
+    aembed = async_cached_embedding(model)(aembed)
+
+    assert asyncio.run(aembed(["ab", "ab"])) == [[2.0, 1.0], [2.0, 1.0]]
+    assert asyncio.run(aembed(["ab"])) == [[2.0, 1.0]]
+    assert calls == [["ab"]]
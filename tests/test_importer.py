@@ -0,0 +1,39 @@
+import os
+
+import pytest
+
+for module in (
+    "cv2",
+    "pytube",
+    "moviepy",
+    "imageio_ffmpeg",
+    "speech_recognition",
+    "PIL",
+    "openai",
+    "qdrant_client",
+):
+    pytest.importorskip(module)
+
+# The OpenAI clients are created on import, no request is made here
+os.environ.setdefault("OPENAI_API_KEY", "test")
+
+from ytb_clone.src.api.importer import frames_on_disk  # noqa: E402
+from ytb_clone.src.utils import thumbnail_path  # noqa: E402
+
+
+def test_cached_frames_need_their_files_and_thumbnails(tmp_path):
+    frame = str(tmp_path / "images" / "video" / "frame0000.png")
+    thumbnail = thumbnail_path(frame)
+
+    for path in (frame, thumbnail):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        open(path, "wb").close()
+
+    assert frames_on_disk({"count": 1, "files": [frame]})
+    assert frames_on_disk({"count": 0, "files": []})
+
+    os.remove(thumbnail)
+    assert not frames_on_disk({"count": 1, "files": [frame]})
+
+    # Recorded before the files were listed
+    assert not frames_on_disk({"count": 1})
@@ -0,0 +1,105 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+pytest.importorskip("qdrant_client")
+
+from qdrant_client import models  # noqa: E402
+
+from ytb_clone.src.database.vector_db.local import LocalVectorDB  # noqa: E402
+
+
+def video_filter(video_id):
+    return models.Filter(
+        must=[
+            models.FieldCondition(
+                key="video_id", match=models.MatchValue(value=video_id)
+            )
+        ]
+    )
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = LocalVectorDB("images", path=str(tmp_path))
+    db.ensure_collection(4)
+
+    vectors = np.eye(4, dtype=np.float32)
+    payloads = [
+        {"video_id": "a", "start": 0, "end": 2, "data": "a0"},
+        {"video_id": "a", "start": 2, "end": 4, "data": "a1"},
+        {"video_id": "b", "start": 0, "end": 2, "data": "b0"},
+        {"video_id": "b", "start": 2, "end": 4, "data": "b1"},
+    ]
+    db.batch_insert(vectors, payloads)
+
+    return db
+
+
+def test_filtered_search_only_returns_that_video(db):
+    hits = db.search([0, 0, 1, 0], video_filter("a"), limit=5)
+
+    assert [hit.payload["video_id"] for hit in hits] == ["a", "a"]
+    assert db.search([0, 0, 1, 0], limit=1)[0].payload["data"] == "b0"
+
+
+def test_search_options(db):
+    [hit] = db.search(
+        [1, 0.1, 0, 0], video_filter("a"), score_threshold=0.5, with_payload=["data"]
+    )
+
+    assert hit.payload == {"data": "a0"}
+    assert hit.score == pytest.approx(1 / np.sqrt(1.01))
+    assert asyncio.run(db.async_search([1, 0, 0, 0], video_filter("a"), limit=1))[0].id == hit.id
+
+
+def test_persisted_partitions_and_clear(db, tmp_path):
+    reopened = LocalVectorDB("images", path=str(tmp_path))
+
+    assert reopened.count() == 4
+    assert reopened.count(video_filter("b")) == 2
+
+    reopened.clear(video_filter("b"))
+
+    assert reopened.count(video_filter("b")) == 0
+    assert LocalVectorDB("images", path=str(tmp_path)).count() == 2
+
+
+def test_unwaited_inserts_are_searchable_and_flushed_by_the_last(tmp_path):
+    db = LocalVectorDB("texts", path=str(tmp_path))
+    payload = {"video_id": "c", "start": 0, "end": 1, "data": "c"}
+
+    db.batch_insert(np.eye(4, dtype=np.float32)[:2], [payload] * 2, wait=False)
+
+    assert db.count(video_filter("c")) == 2
+    assert not (tmp_path / "texts" / "c" / "points.json").exists()
+
+    db.batch_insert(np.eye(4, dtype=np.float32)[2:], [payload] * 2, wait=True)
+
+    reopened = LocalVectorDB("texts", path=str(tmp_path))
+    assert reopened.count(video_filter("c")) == 4
+    assert reopened.search([0, 0, 0, 1], video_filter("c"), limit=1)[0].score == pytest.approx(1)
+
+
+def test_extra_vectors_from_an_interrupted_write_are_ignored(db, tmp_path):
+    folder = tmp_path / "images" / "a"
+    np.save(folder / "vectors.npy", np.eye(4, dtype=np.float32))
+
+    reopened = LocalVectorDB("images", path=str(tmp_path))
+
+    assert reopened.count(video_filter("a")) == 2
+    assert len(reopened.search([0, 0, 0, 1], video_filter("a"), limit=5)) == 2
+
+
+@pytest.mark.parametrize("video_id", ["../a", "a/b", "..", "/tmp/a"])
+def test_video_ids_cannot_leave_the_store(tmp_path, video_id):
+    db = LocalVectorDB("texts", path=str(tmp_path / "store"))
+
+    with pytest.raises(ValueError):
+        db.batch_insert(
+            [[1.0, 0.0]], [{"video_id": video_id, "start": 0, "end": 1, "data": "x"}]
+        )
+
+    with pytest.raises(ValueError):
+        db.search([1.0, 0.0], video_filter(video_id))
@@ -0,0 +1,93 @@
+import random
+
+from ytb_clone.src.retrieval.temporal import join_frames
+
+
+def nested_loop(segments, frames, tolerance=0):
+    merged = {}
+    added = set()
+    for item in segments:
+        entry = merged.setdefault(
+            item["data"], {"start": item["start"], "end": item["end"], "frames": []}
+        )
+        for frame in frames:
+            if (
+                frame["start"] <= item["end"] + tolerance
+                and item["start"] - tolerance <= frame["end"]
+                and frame["data"] not in entry["frames"]
+            ):
+                entry["frames"].append(frame["data"])
+                added.add(frame["data"])
+
+    for entry in merged.values():
+        entry["frames"].sort()
+
+    return merged, [f["data"] for f in frames if f["data"] not in added]
+
+
+def random_hits(n, m, seed):
+    rng = random.Random(seed)
+    segments = []
+    for i in range(n):
+        start = rng.uniform(0, 600)
+        segments.append(
+            {"start": start, "end": start + rng.uniform(1, 40), "data": f"text {i}"}
+        )
+
+    frames = []
+    for second in rng.sample(range(600), m):
+        frames.append({"start": second, "end": second + 2, "data": f"frame{second:04d}"})
+
+    return segments, frames
+
+
+def test_matches_nested_loop_on_random_hits():
+    for seed in range(20):
+        segments, frames = random_hits(50, 80, seed)
+
+        for tolerance in (0, 1.5):
+            assert join_frames(segments, frames, tolerance) == nested_loop(
+                segments, frames, tolerance
+            )
+
+
+def test_tolerance_window():
+    segments = [{"start": 10, "end": 20, "data": "text"}]
+    frames = [
+        {"start": 7, "end": 9, "data": "frame0007"},
+        {"start": 9, "end": 11, "data": "frame0009"},
+        {"start": 21, "end": 23, "data": "frame0021"},
+        {"start": 30, "end": 32, "data": "frame0030"},
+    ]
+
+    merged, unassigned = join_frames(segments, frames)
+    assert merged["text"]["frames"] == ["frame0009"]
+    assert unassigned == ["frame0007", "frame0021", "frame0030"]
+
+    merged, unassigned = join_frames(segments, frames, tolerance=1)
+    assert merged["text"]["frames"] == ["frame0007", "frame0009", "frame0021"]
+    assert unassigned == ["frame0030"]
+
+
+def test_deduplicated_frames_span_several_segments():
+    segments = [
+        {"start": 0, "end": 30, "data": "intro"},
+        {"start": 30, "end": 60, "data": "talk"},
+        {"start": 60, "end": 90, "data": "more talk"},
+        {"start": 200, "end": 230, "data": "outro"},
+    ]
+    # A talking head kept as one frame for two minutes, then a slide
+    frames = [
+        {"start": 10, "end": 130, "data": "frame0010"},
+        {"start": 130, "end": 135, "data": "frame0130"},
+    ]
+
+    merged, unassigned = join_frames(segments, frames)
+
+    assert [merged[text]["frames"] for text in merged] == [
+        ["frame0010"],
+        ["frame0010"],
+        ["frame0010"],
+        [],
+    ]
+    assert unassigned == ["frame0130"]
@@ -0,0 +1,46 @@
+import pytest
+
+sr = pytest.importorskip("speech_recognition")
+
+from ytb_clone.src.fetch.transcriber import (  # noqa: E402
+    FakeTranscriber,
+    get_transcriber,
+    is_transient,
+)
+
+
+def test_fake_transcriber_is_deterministic():
+    transcriber = FakeTranscriber()
+    audio = sr.AudioData(b"\x01\x00" * 16000, 16000, 2)
+
+    assert transcriber.transcribe(audio) == transcriber.transcribe(audio)
+    assert transcriber.transcribe(audio).endswith("of 1.00 seconds")
+    assert transcriber.transcribe(audio) != transcriber.transcribe(
+        sr.AudioData(b"\x02\x00" * 16000, 16000, 2)
+    )
+
+
+def test_get_transcriber_selects_backend():
+    assert isinstance(get_transcriber("fake"), FakeTranscriber)
+    assert get_transcriber("fake") is get_transcriber("fake")
+
+    with pytest.raises(ValueError):
+        get_transcriber("unknown")
+
+
+class StatusError(Exception):
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+def test_only_transient_errors_are_retried():
+    assert is_transient(ConnectionError("reset"))
+    assert is_transient(TimeoutError())
+    assert is_transient(StatusError(429))
+    assert is_transient(StatusError(503))
+    assert is_transient(sr.RequestError("recognition connection failed: timed out"))
+
+    assert not is_transient(StatusError(401))
+    assert not is_transient(StatusError(400))
+    assert not is_transient(sr.RequestError("recognition request failed: Unauthorized"))
+    assert not is_transient(ValueError("bad audio"))
@@ -0,0 +1,84 @@
+import numpy as np
+
+from ytb_clone.src.fetch.vad import iter_speech_segments
+
+SAMPLE_RATE = 16000
+
+
+def tone(seconds, amplitude=8000):
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return (amplitude * np.sin(2 * np.pi * 220 * t)).astype(np.int16)
+
+
+def silence(seconds):
+    return np.zeros(int(seconds * SAMPLE_RATE), dtype=np.int16)
+
+
+def blocks(samples, size=4096):
+    data = samples.tobytes()
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def segments(samples, **kwargs):
+    return list(
+        iter_speech_segments(blocks(samples), sample_rate=SAMPLE_RATE, **kwargs)
+    )
+
+
+def test_skips_silence_and_keeps_timestamps():
+    audio = np.concatenate([silence(5), tone(2), silence(5)])
+
+    [(start, end, data)] = segments(audio, padding=0)
+
+    assert abs(start - 5) < 0.1
+    assert abs(end - 7) < 0.1
+    assert len(data) == expected_bytes(end - start)
+
+
+def test_merges_short_segments_up_to_target():
+    audio = np.concatenate([tone(2), silence(1), tone(2), silence(1), tone(2)])
+
+    result = segments(audio, target_duration=5.5, padding=0)
+
+    assert len(result) == 2
+    assert result[0][0] < 0.1 and abs(result[0][1] - 5) < 0.1
+    assert abs(result[1][0] - 6) < 0.1
+
+
+def test_merged_segments_span_at_most_target():
+    audio = np.concatenate([tone(2), silence(20), tone(2)])
+
+    result = segments(audio, target_duration=10, padding=0)
+
+    assert [(round(start), round(end)) for start, end, _ in result] == [(0, 2), (22, 24)]
+
+
+def test_cuts_long_speech_at_target():
+    result = segments(tone(10), target_duration=3, padding=0, cut_overlap=0)
+
+    assert len(result) == 4
+    assert all(end - start <= 3.01 for start, end, _ in result)
+
+
+def test_forced_cuts_overlap():
+    result = segments(tone(10), target_duration=3, padding=0, cut_overlap=1)
+
+    assert [(round(start), round(end)) for start, end, _ in result] == [
+        (0, 3),
+        (2, 5),
+        (4, 7),
+        (6, 9),
+        (8, 10),
+    ]
+    assert all(len(data) == expected_bytes(end - start) for start, end, data in result)
+
+
+def test_drops_clicks_and_silence_only_audio():
+    audio = np.concatenate([silence(2), tone(0.06), silence(2)])
+
+    assert segments(audio) == []
+    assert segments(silence(3)) == []
+
+
+def expected_bytes(seconds):
+    return int(round(seconds / 0.03)) * int(SAMPLE_RATE * 0.03) * 2
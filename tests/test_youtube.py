@@ -0,0 +1,112 @@
+import pytest
+
+for module in ("cv2", "pytube", "moviepy", "imageio_ffmpeg", "speech_recognition"):
+    pytest.importorskip(module)
+
+from ytb_clone.src.fetch.downloader import youtube  # noqa: E402
+from ytb_clone.src.fetch.downloader.youtube import split_segments  # noqa: E402
+
+
+def test_split_segments_covers_every_frame_in_order():
+    frame_indices = list(range(0, 100, 3))
+
+    chunks = split_segments(frame_indices, 4)
+
+    assert len(chunks) == 4
+    assert [i for chunk in chunks for i in chunk] == frame_indices
+
+
+def test_split_segments_with_few_or_no_frames():
+    assert split_segments([0, 30], 8) == [[0], [30]]
+    assert split_segments([], 4) == []
+
+
+class FlakyTranscriber:
+    def __init__(self, failures, error=ConnectionError("timeout")):
+        self.failures = failures
+        self.error = error
+        self.calls = 0
+
+    def transcribe(self, audio):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise self.error
+        return "hello"
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    delays = []
+    monkeypatch.setattr(youtube.time, "sleep", delays.append)
+    monkeypatch.setattr(youtube, "TRANSCRIBE_RETRIES", 3)
+    monkeypatch.setattr(youtube, "TRANSCRIBE_BACKOFF", 0.5)
+    return delays
+
+
+def test_process_chunk_retries_with_exponential_backoff(sleeps):
+    transcriber = FlakyTranscriber(failures=2)
+
+    result = youtube.process_chunk(0, 30, 60, None, transcriber)
+
+    assert result == {"start": 30, "end": 60, "text": "hello"}
+    assert sleeps == [0.5, 1.0]
+
+
+def test_process_chunk_raises_after_last_attempt(sleeps):
+    transcriber = FlakyTranscriber(failures=10)
+
+    with pytest.raises(RuntimeError, match="failed after 4 attempts"):
+        youtube.process_chunk(1, 0, 30, None, transcriber)
+
+    assert transcriber.calls == 4
+    assert sleeps == [0.5, 1.0, 2.0]
+
+
+def test_process_chunk_does_not_retry_unintelligible_audio(sleeps):
+    import speech_recognition as sr
+
+    transcriber = FlakyTranscriber(failures=1, error=sr.UnknownValueError())
+
+    assert youtube.process_chunk(2, 0, 30, None, transcriber) is None
+    assert transcriber.calls == 1
+    assert sleeps == []
+
+
+def test_process_chunk_raises_permanent_errors_right_away(sleeps):
+    transcriber = FlakyTranscriber(failures=10, error=PermissionError("invalid key"))
+
+    with pytest.raises(PermissionError):
+        youtube.process_chunk(3, 0, 30, None, transcriber)
+
+    assert transcriber.calls == 1
+    assert sleeps == []
+
+
+def test_transcribe_chunks_stops_at_the_first_failed_chunk(monkeypatch, sleeps):
+    class FailingTranscriber:
+        max_workers = 1
+
+        def __init__(self):
+            self.calls = 0
+
+        def transcribe(self, audio):
+            self.calls += 1
+            raise PermissionError("invalid key")
+
+    transcriber = FailingTranscriber()
+    decoded = []
+
+    def chunks():
+        for i in range(100):
+            decoded.append(i)
+            yield i * 30, (i + 1) * 30, None
+
+    monkeypatch.setattr(youtube, "get_transcriber", lambda: transcriber)
+    monkeypatch.setattr(youtube, "TRANSCRIBE_QUEUE_DEPTH", 2)
+
+    with pytest.raises(PermissionError):
+        youtube.transcribe_chunks(chunks())
+
+    # At most the chunks already queued behind the failed one are attempted
+    assert transcriber.calls <= 2
+    assert len(decoded) <= 3
@@ -1,196 +1,216 @@
-from fastapi import FastAPI
+import asyncio
+import time
+
+from fastapi import FastAPI, Header, HTTPException
 from starlette.middleware.cors import CORSMiddleware
 import uvicorn
-import json
 from dotenv import load_dotenv
-from uuid import uuid4
-from qdrant_client import models
 
 from fastapi.responses import StreamingResponse
 
 from ytb_clone.src.api.model import VidImportParams, VidQueryParams
-
-from ytb_clone.src.fetch.downloader.youtube import (
-    download_video,
-    video_to_audio,
-    video_to_images,
-    audio_to_text,
+from ytb_clone.src.api.db import bootstrap
+from ytb_clone.src.api.importer import sse
+from ytb_clone.src.api.jobs import DONE, FAILED, JobManager
+from ytb_clone.src.api.retrieval import embed_question, search_images, search_texts
+
+from ytb_clone.src.config import (
+    ANSWER_CACHE,
+    CLIP_WARMUP,
+    QUERY_EMBEDDING_TIMEOUT,
+    QUERY_RETRIEVAL,
 )
 
-import glob
+from ytb_clone.src.llm.answer_cache import get_answer_cache
+from ytb_clone.src.llm.openai_vision import get_response, replay_response
+from ytb_clone.src.retrieval.temporal import join_frames
 
-from ytb_clone.src.database.vector_db.qdrant import QdrantDB
-from ytb_clone.src.llm.openai_vision import get_response
-
-from ytb_clone.src.embedding.image.clip import get_embedding as image_embedding
+from ytb_clone.src.embedding.cache import stats as embedding_cache_stats
 from ytb_clone.src.embedding.text.openai import get_embedding as text_embedding
-from ytb_clone.src.embedding.text.clip import (
-    get_embedding as clip_text_embedding,
-)
+from ytb_clone.src.embedding.registry import warmup
 
 path_env = ".env"
 load_dotenv(path_env)
 
 app = FastAPI()
 
-images_db = QdrantDB("images", "localhost", 6333)
+jobs = JobManager()
 
-texts_db = QdrantDB("texts", "localhost", 6333)
 
+@app.on_event("startup")
+def load_models():
+    bootstrap()
 
-def import_images_embedding(images_files, vid_id):
-    image_embs = image_embedding(images_files)
+    if CLIP_WARMUP:
+        warmup()
 
-    for idx, emb in enumerate(image_embs):
-        file_name = images_files[idx].split("/")[-1]
-        file_name = file_name.split(".")[0]
-        chunk_name = file_name[-4:]
+    jobs.resume()
 
-        chunk_id = int(chunk_name)
 
-        offset = 1 if chunk_id == 0 else 2
-
-        payload = {
-            "video_id": vid_id,
-            "start": chunk_id,
-            "end": chunk_id + offset,
-            "data": images_files[idx],
-        }
+@app.get("/", tags=["Root"])
+async def read_root():
+    return {"message": "Youtube RAG"}
 
-        images_db.insert(emb, payload)
 
+@app.get("/cache/stats", tags=["Root"])
+async def cache_stats():
+    stats = {"embeddings": embedding_cache_stats()}
 
-def import_texts_embedding(transcribes, vid_id):
-    texts = [i["text"] for i in transcribes]
-    text_embs = text_embedding(texts)
+    if ANSWER_CACHE:
+        stats["answers"] = get_answer_cache().stats()
 
-    for idx, emb in enumerate(text_embs):
+    return stats
 
-        payload = {
-            "video_id": vid_id,
-            "start": transcribes[idx]["start"],
-            "end": transcribes[idx]["end"],
-            "data": transcribes[idx]["text"],
-        }
 
-        texts_db.insert(emb, payload)
+@app.post("/import", tags=["RAG"])
+async def import_video(params: VidImportParams):
 
+    url = params.video_url
 
-def import_embeddings(images_files, transcribes, vid_id: int):
     try:
-        print("Importing image")
-        import_images_embedding(images_files, vid_id)
+        job = await asyncio.to_thread(jobs.submit, url)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-        print("Importing text")
+    return {"job_id": job["id"], "video_id": job["video_id"], "status": job["status"]}
 
-        import_texts_embedding(transcribes, vid_id)
-    except Exception as e:
-        raise e
 
+@app.get("/import/{job_id}", tags=["RAG"])
+async def import_status(job_id: str):
+    job = await asyncio.to_thread(jobs.status, job_id)
 
-@app.get("/", tags=["Root"])
-async def read_root():
-    return {"message": "Youtube RAG"}
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
 
+    return job
 
-def import_video_stream(url=""):
-    yield "data:" + json.dumps({"message": "Start processing"}) + "\n\n"
 
-    try:
-        video_id = url.split("=")[1]
-    except Exception:
-        video_id = uuid4()
+async def job_event_stream(job_id, after):
+    while True:
+        # Read the status first, events written before it finished are then all visible
+        job = await asyncio.to_thread(jobs.store.get, job_id)
+
+        for seq, event in await asyncio.to_thread(jobs.store.events, job_id, after):
+            after = seq
+            yield f"id:{seq}\n" + sse(event)
 
-    yield "data:" + json.dumps({"message": "Downloading.."}) + "\n\n"
+        if job["status"] in (DONE, FAILED):
+            return
 
-    video_meta = download_video(url, video_id)
-    video_path = video_meta["output_path"]
+        await asyncio.sleep(0.5)
 
-    yield "data:" + json.dumps({"message": "Extracting frames from video"}) + "\n\n"
 
-    images_path = video_to_images(video_path, vid_id=video_id)
+@app.get("/import/{job_id}/events", tags=["RAG"])
+async def import_events(job_id: str, last_event_id: int = Header(-1)):
+    if await asyncio.to_thread(jobs.store.get, job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
 
-    image_files = glob.glob(f"{images_path}/*.png")
+    # Reconnecting clients resume after the last event they saw
+    return StreamingResponse(
+        job_event_stream(job_id, last_event_id), media_type="text/event-stream"
+    )
 
-    yield "data:" + json.dumps({"message": "Transcribing video"}) + "\n\n"
 
-    audio_path = video_to_audio(video_path, video_id)
-    transcribes = audio_to_text(audio_path, video_id)
+async def cached_answer(video_id, question_emb):
+    """
+    Returns the cached answer and the question embedding, the embedding is
+    None when it failed, timed out or the answer cache is not used.
+    """
+    if question_emb is None:
+        return None, None
 
-    yield "data:" + json.dumps(
-        {"message": "Importing embedding to vector database"}
-    ) + "\n\n"
+    try:
+        embedding = (
+            await asyncio.wait_for(
+                asyncio.shield(question_emb), QUERY_EMBEDDING_TIMEOUT
+            )
+        )[0]
+    except Exception as e:
+        print(f"Question embedding failed, skipping the answer cache: {e!r}")
+        return None, None
 
-    import_embeddings(image_files, transcribes, video_id)
+    answer = await asyncio.to_thread(get_answer_cache().get, video_id, embedding)
 
-    yield "data:" + json.dumps(
-        {"message": "Import Success!", "video_id": video_id}
-    ) + "\n\n"
+    return answer, embedding
 
 
-@app.post("/import", tags=["RAG"])
-async def import_video(params: VidImportParams):
+def answer_store(video_id, question, embedding):
+    """
+    The callback storing the streamed answer.
 
-    url = params.video_url
+    Without an embedding (it failed or timed out before the lookup) the
+    question is embedded once the answer is complete. An embedding that
+    finished late is in the embedding cache by then, so this only calls the
+    API again when it failed.
+    """
 
-    return StreamingResponse(import_video_stream(url), media_type="text/event-stream")
+    def store(answer):
+        vector = embedding
+
+        if vector is None:
+            try:
+                vector = text_embedding([question])[0]
+            except Exception as e:
+                print(f"Question embedding failed, answer not cached: {e!r}")
+                return
+
+        get_answer_cache().put(video_id, question, vector, answer)
+
+    return store
 
 
 @app.post("/query", tags=["RAG"])
 async def query_video(params: VidQueryParams):
     video_id = params.video_id
     question = params.question
+    use_cache = ANSWER_CACHE and params.use_answer_cache
 
-    text_emb = text_embedding([question])[0]
-    clip_text_emb = clip_text_embedding([question])[0]
-
-    related_texts = texts_db.search(
-        text_emb,
-        models.Filter(
-            must=[
-                models.FieldCondition(
-                    key="video_id",
-                    match=models.MatchValue(value=video_id),
-                ),
-            ]
-        ),
-    )
+    timings = {}
+    start = time.time()
 
-    related_images = images_db.search(
-        clip_text_emb,
-        models.Filter(
-            must=[
-                models.FieldCondition(
-                    key="video_id",
-                    match=models.MatchValue(value=video_id),
-                ),
-            ]
-        ),
+    question_emb = (
+        None if QUERY_RETRIEVAL == "sparse" else embed_question(question, timings)
     )
+    # Sparse retrieval makes no embedding call, so it skips the answer cache too
+    use_cache = use_cache and question_emb is not None
 
-    related_texts = [i.payload for i in related_texts]
+    # Both retrieval chains start right away, the cache lookup runs alongside
+    texts = asyncio.ensure_future(
+        search_texts(video_id, question, question_emb, timings)
+    )
+    images = asyncio.ensure_future(search_images(video_id, question, timings))
 
-    related_images = [i.payload for i in related_images]
+    answer, embedding = await cached_answer(
+        video_id, question_emb if use_cache else None
+    )
 
-    merged_data = {}
+    if answer is not None:
+        texts.cancel()
+        images.cancel()
+        print(f"Answer cache hit for {video_id}: {question}")
+        return StreamingResponse(
+            replay_response(answer), media_type="text/event-stream"
+        )
 
-    added_frame = []
+    related_texts, related_images = await asyncio.gather(texts, images)
 
-    for item in related_texts:
-        start = item["start"]
-        end = item["end"]
-        merged_data[item["data"]] = {"start": start, "end": end, "frames": []}
+    timings["retrieval"] = round(time.time() - start, 3)
+    print(f"Query retrieval timings for {video_id}: {timings}")
 
-        for frame in related_images:
-            if frame["start"] >= start and frame["end"] <= end:
-                merged_data[item["data"]]["frames"].append(frame["data"])
-                added_frame.append(frame["data"])
+    # Frames imported without persistence have nothing to show the vision model
+    related_images = [i for i in related_images if i["data"]]
 
-    no_trans_frame = [i["data"] for i in related_images if i["data"] not in added_frame]
+    merged_data, no_trans_frame = join_frames(related_texts, related_images)
 
     ytb_url = f"https://www.youtube.com/watch?v={video_id}" + "&t={}s"
 
-    response = get_response(merged_data, no_trans_frame, question, ytb_url)
+    response = await get_response(
+        merged_data,
+        no_trans_frame,
+        question,
+        ytb_url,
+        answer_store(video_id, question, embedding) if use_cache else None,
+    )
 
     return StreamingResponse(response, media_type="text/event-stream")
 
@@ -0,0 +1,121 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from uuid import uuid4
+
+from ytb_clone.src import config
+from ytb_clone.src.config import IMPORT_CACHE, IMPORT_CACHE_DIR
+
+
+def stage_key(video_id, stage, settings):
+    """
+    Content address of a stage output: the video, the stage and every setting
+    that changes its output (including the keys of upstream stages).
+    """
+    data = json.dumps(
+        {"video_id": video_id, "stage": stage, "settings": settings},
+        sort_keys=True,
+    )
+    return hashlib.sha256(data.encode()).hexdigest()[:16]
+
+
+def frames_settings():
+    return {
+        name: getattr(config, name)
+        for name in (
+            "CLIP_MODEL",
+            "CLIP_BACKEND",
+            "FRAME_FPS",
+            "FRAME_DEDUP",
+            "FRAME_DEDUP_THRESHOLD",
+            "FRAME_STREAM",
+            "FRAME_PERSIST",
+            "FRAME_FORMAT",
+            "FRAME_QUALITY",
+        )
+    }
+
+
+def transcript_settings():
+    return {
+        name: getattr(config, name)
+        for name in (
+            "TRANSCRIBE_BACKEND",
+            "LOCAL_WHISPER_MODEL",
+            "AUDIO_STREAM",
+            "AUDIO_SAMPLE_RATE",
+            "AUDIO_CHUNK_DURATION",
+            "TRANSCRIBE_VAD",
+            "VAD_THRESHOLD_DB",
+            "VAD_MIN_SILENCE",
+            "VAD_MIN_SPEECH",
+            "VAD_PADDING",
+            "VAD_CUT_OVERLAP",
+        )
+    }
+
+
+class ArtifactCache:
+    """
+    Manifest of the completed import stages of one video.
+
+    Every stage is recorded with its key and a small result (paths, counts),
+    a stage is reused only when its key matches and `validate` accepts the
+    recorded result. The manifest is rewritten atomically after each stage,
+    so a failed import resumes from the last completed one.
+    """
+
+    def __init__(self, video_id, cache_dir=IMPORT_CACHE_DIR, enabled=IMPORT_CACHE):
+        self.video_id = video_id
+        self.enabled = enabled
+        self.dir = os.path.join(cache_dir, video_id)
+        self.path = os.path.join(self.dir, "manifest.json")
+        self.lock = threading.Lock()
+
+        self.stages = {}
+        if enabled and os.path.exists(self.path):
+            with open(self.path) as f:
+                self.stages = json.load(f)
+
+    def get(self, stage, key, validate=None):
+        """
+        Returns the recorded result of a stage, None on a miss.
+        """
+        if not self.enabled:
+            return None
+
+        entry = self.stages.get(stage)
+
+        if entry is None or entry["key"] != key:
+            return None
+
+        if validate is not None and not validate(entry["result"]):
+            print(f"Cached {stage} of {self.video_id} is no longer valid")
+            return None
+
+        return entry["result"]
+
+    def put(self, stage, key, result):
+        if not self.enabled:
+            return
+
+        with self.lock:
+            self.stages[stage] = {
+                "key": key,
+                "result": result,
+                "completed_at": time.time(),
+            }
+
+            os.makedirs(self.dir, exist_ok=True)
+            temp_path = f"{self.path}.{uuid4().hex}"
+
+            with open(temp_path, "w") as f:
+                json.dump(self.stages, f)
+
+            os.replace(temp_path, self.path)
+
+    def file(self, name):
+        os.makedirs(self.dir, exist_ok=True)
+        return os.path.join(self.dir, name)
@@ -0,0 +1,42 @@
+from qdrant_client import models
+
+from ytb_clone.src.config import (
+    IMAGE_VECTOR_SIZE,
+    QDRANT_HOST,
+    QDRANT_PORT,
+    TEXT_VECTOR_SIZE,
+    VECTOR_DB,
+)
+from ytb_clone.src.database.vector_db.local import LocalVectorDB
+from ytb_clone.src.database.vector_db.qdrant import QdrantDB
+
+
+def create_db(collection):
+    if VECTOR_DB == "local":
+        return LocalVectorDB(collection)
+
+    if VECTOR_DB == "qdrant":
+        return QdrantDB(collection, QDRANT_HOST, QDRANT_PORT)
+
+    raise ValueError(f"Unknown vector database: {VECTOR_DB}")
+
+
+images_db = create_db("images")
+
+texts_db = create_db("texts")
+
+
+def video_filter(video_id):
+    return models.Filter(
+        must=[
+            models.FieldCondition(
+                key="video_id",
+                match=models.MatchValue(value=video_id),
+            ),
+        ]
+    )
+
+
+def bootstrap():
+    images_db.ensure_collection(IMAGE_VECTOR_SIZE)
+    texts_db.ensure_collection(TEXT_VECTOR_SIZE)
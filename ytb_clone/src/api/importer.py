@@ -0,0 +1,497 @@
+import glob
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from uuid import uuid4
+
+from ytb_clone.src.api.artifacts import (
+    ArtifactCache,
+    frames_settings,
+    stage_key,
+    transcript_settings,
+)
+from ytb_clone.src.api.db import images_db, texts_db, video_filter
+from ytb_clone.src.config import (
+    ANSWER_CACHE,
+    AUDIO_STREAM,
+    CLIP_BATCH_SIZE,
+    FRAME_DEDUP,
+    FRAME_FPS,
+    FRAME_PERSIST,
+    FRAME_STREAM,
+    TRANSCRIPT_PERSIST,
+)
+from ytb_clone.src.embedding.image.clip import (
+    get_embedding as image_embedding,
+    get_frames_embedding as image_frames_embedding,
+)
+from ytb_clone.src.embedding.text.openai import get_embedding as text_embedding
+from ytb_clone.src.fetch.dedup import dedup_frames, dedup_image_files
+from ytb_clone.src.fetch.downloader.youtube import (
+    FrameWriter,
+    audio_to_text,
+    download_video,
+    iter_frames,
+    video_to_audio,
+    video_to_images,
+    video_to_text,
+)
+from ytb_clone.src.llm.answer_cache import get_answer_cache
+from ytb_clone.src.retrieval.bm25 import build_index, has_index
+from ytb_clone.src.utils import save_thumbnails, thumbnail_path
+from ytb_clone.src.video_id import is_video_id
+
+# Decoded batches waiting for CLIP, bounds the memory held by the decoder
+FRAME_QUEUE_DEPTH = 4
+
+_DONE = object()
+
+
+class StageTimer:
+    """
+    Accumulates wall time per pipeline stage, safe to share between threads.
+    """
+
+    def __init__(self):
+        self.timings = {}
+        self.lock = threading.Lock()
+
+    def add(self, name, seconds):
+        with self.lock:
+            self.timings[name] = round(self.timings.get(name, 0) + seconds, 3)
+
+    @contextmanager
+    def stage(self, name):
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.add(name, time.time() - start)
+
+
+def sse(data):
+    return "data:" + json.dumps(data) + "\n\n"
+
+
+def import_images_embedding(images_files, vid_id, spans=None):
+    image_embs = image_embedding(images_files)
+    payloads = []
+
+    for idx in range(len(image_embs)):
+        if spans is not None:
+            start, end = spans[idx]
+        else:
+            file_name = images_files[idx].split("/")[-1]
+            file_name = file_name.split(".")[0]
+            chunk_name = file_name[-4:]
+
+            chunk_id = int(chunk_name)
+
+            offset = 1 if chunk_id == 0 else 2
+
+            start, end = chunk_id, chunk_id + offset
+
+        payloads.append(
+            {
+                "video_id": vid_id,
+                "start": start,
+                "end": end,
+                "data": images_files[idx],
+            }
+        )
+
+    images_db.batch_insert(image_embs, payloads)
+
+
+def decode_batches(video_path, timer, batches, stop):
+    """
+    Producer side of the frame stream: decode, deduplicate and batch frames.
+    """
+    frames = ((second, frame, frame) for second, frame in iter_frames(video_path))
+
+    if FRAME_DEDUP:
+        frames = dedup_frames(frames)
+    else:
+        # Same span as a kept frame without duplicates, one sampling interval
+        frames = (
+            (second, second + 1 / FRAME_FPS, frame) for second, _, frame in frames
+        )
+
+    try:
+        batch = []
+        start = time.time()
+
+        for item in frames:
+            if stop.is_set():
+                return
+
+            batch.append(item)
+
+            if len(batch) == CLIP_BATCH_SIZE:
+                timer.add("decode", time.time() - start)
+                batches.put(batch)
+                batch = []
+                start = time.time()
+
+        timer.add("decode", time.time() - start)
+
+        if batch:
+            batches.put(batch)
+    except Exception as e:
+        # Handed to the consumer, ending the stream here would pass for a
+        # complete import
+        batches.put(e)
+    finally:
+        batches.put(_DONE)
+
+
+def import_frames_stream(video_path, vid_id, timer=None):
+    """
+    Decode, deduplicate and embed frames in batches without a disk round-trip,
+    frames are persisted in the background when FRAME_PERSIST is set.
+
+    Decoding runs in its own thread, so CLIP and the upserts of early
+    batches overlap with the decoding of later frames.
+
+    Returns the number of frames and the paths of the persisted ones.
+    """
+    timer = timer or StageTimer()
+    writer = FrameWriter(f"data/images/{vid_id}") if FRAME_PERSIST else None
+    batches = queue.Queue(maxsize=FRAME_QUEUE_DEPTH)
+    stop = threading.Event()
+    total = 0
+    files = []
+
+    decoder = threading.Thread(
+        target=decode_batches,
+        args=(video_path, timer, batches, stop),
+        daemon=True,
+    )
+    decoder.start()
+
+    def flush(batch, wait):
+        with timer.stage("image_embedding"):
+            image_embs = image_frames_embedding([frame for _, _, frame in batch])
+
+        payloads = [
+            {
+                "video_id": vid_id,
+                "start": start,
+                "end": end,
+                "data": writer.write(start, frame) if writer else None,
+            }
+            for start, end, frame in batch
+        ]
+
+        with timer.stage("image_upsert"):
+            images_db.batch_insert(image_embs, payloads, wait=wait)
+
+        files.extend(payload["data"] for payload in payloads if payload["data"])
+
+    try:
+        pending = None
+
+        while (batch := batches.get()) is not _DONE:
+            if isinstance(batch, Exception):
+                raise batch
+
+            # Hold back one batch so the final upsert is never empty
+            if pending:
+                flush(pending, wait=False)
+                total += len(pending)
+
+            pending = batch
+
+        # The last upsert waits, so every earlier one is applied too
+        if pending:
+            flush(pending, wait=True)
+            total += len(pending)
+    finally:
+        # Unblock the decoder if we stopped consuming early
+        stop.set()
+        while decoder.is_alive():
+            try:
+                batches.get(timeout=0.1)
+            except queue.Empty:
+                pass
+
+        if writer:
+            writer.close()
+
+    return total, files
+
+
+def import_texts_embedding(transcribes, vid_id):
+    texts = [i["text"] for i in transcribes]
+    text_embs = text_embedding(texts)
+
+    payloads = [
+        {
+            "video_id": vid_id,
+            "start": transcribe["start"],
+            "end": transcribe["end"],
+            "data": transcribe["text"],
+        }
+        for transcribe in transcribes
+    ]
+
+    texts_db.batch_insert(text_embs, payloads)
+
+
+def cached_import(cache, stage, key, db, video_id, validate=None):
+    """
+    Returns the recorded result of an import stage when its points are still
+    all in the collection and `validate`, if given, accepts it.
+    """
+    return cache.get(
+        stage,
+        key,
+        validate=lambda result: db.count(video_filter(video_id)) == result["count"]
+        and (validate is None or validate(result)),
+    )
+
+
+def frames_on_disk(result):
+    # Points of persisted frames refer to their files, the vision model gets
+    # the thumbnails. Results recorded before files were listed re-import
+    return "files" in result and all(
+        os.path.exists(path) and os.path.exists(thumbnail_path(path))
+        for path in result["files"]
+    )
+
+
+def import_frames(get_video_path, video_id, cache, timer, events):
+    key = stage_key(video_id, "frames", frames_settings())
+
+    cached = cached_import(cache, "frames", key, images_db, video_id, frames_on_disk)
+
+    if cached is not None:
+        events.put({"message": f"Reused {cached['count']} cached frames"})
+        return
+
+    video_path = get_video_path()
+
+    # Drop points of an earlier or partially failed import before re-importing
+    images_db.clear(video_filter(video_id))
+
+    if FRAME_STREAM:
+        total, files = import_frames_stream(video_path, video_id, timer)
+    else:
+        with timer.stage("decode"):
+            images_path = video_to_images(video_path, vid_id=video_id)
+            image_files = glob.glob(f"{images_path}/*.png")
+
+        spans = None
+
+        if FRAME_DEDUP:
+            with timer.stage("dedup"):
+                frames = dedup_image_files(image_files)
+
+            image_files = [i["data"] for i in frames]
+            spans = [(i["start"], i["end"]) for i in frames]
+
+        with timer.stage("image_embedding"):
+            import_images_embedding(image_files, video_id, spans)
+
+        with timer.stage("thumbnails"):
+            save_thumbnails(image_files)
+
+        total = len(image_files)
+        files = image_files
+
+    cache.put("frames", key, {"count": total, "files": files})
+
+    events.put({"message": f"Imported {total} frames", "timings": timer.timings})
+
+
+def transcribe_video(get_video_path, video_id, cache, key, timer):
+    def validate(result):
+        return os.path.exists(result["path"])
+
+    if (cached := cache.get("transcript", key, validate)) is not None:
+        with open(cached["path"]) as f:
+            return json.load(f)
+
+    video_path = get_video_path()
+
+    if AUDIO_STREAM:
+        # Decoding and transcription overlap, there is no separate audio stage
+        with timer.stage("transcribe"):
+            transcribes = video_to_text(video_path)
+    else:
+        with timer.stage("audio"):
+            audio_path = video_to_audio(video_path, video_id)
+
+        with timer.stage("transcribe"):
+            transcribes = audio_to_text(audio_path)
+
+    if TRANSCRIPT_PERSIST:
+        # The only copy on disk, written then renamed so a concurrent import
+        # of the same video never reads a partial file
+        path = cache.file(f"transcript-{key}.json")
+        temp_path = f"{path}.{uuid4().hex}"
+
+        with open(temp_path, "w") as f:
+            json.dump(transcribes, f)
+
+        os.replace(temp_path, path)
+
+        cache.put("transcript", key, {"path": path, "count": len(transcribes)})
+
+    return transcribes
+
+
+def import_transcript(get_video_path, video_id, cache, timer, events):
+    transcript_key = stage_key(video_id, "transcript", transcript_settings())
+    key = stage_key(
+        video_id,
+        "texts",
+        {"transcript": transcript_key, "model": "text-embedding-ada-002"},
+    )
+
+    if (cached := cached_import(cache, "texts", key, texts_db, video_id)) is not None:
+        # Imports from before the sparse index only need it built
+        if not has_index(video_id):
+            transcribes = transcribe_video(
+                get_video_path, video_id, cache, transcript_key, timer
+            )
+
+            with timer.stage("bm25"):
+                build_index(transcribes, video_id)
+
+        events.put(
+            {"message": f"Reused {cached['count']} cached transcript chunks"}
+        )
+        return
+
+    events.put({"message": "Transcribing video", "timings": timer.timings})
+
+    transcribes = transcribe_video(
+        get_video_path, video_id, cache, transcript_key, timer
+    )
+
+    events.put(
+        {"message": "Importing transcript embedding", "timings": timer.timings}
+    )
+
+    with timer.stage("bm25"):
+        build_index(transcribes, video_id)
+
+    texts_db.clear(video_filter(video_id))
+
+    with timer.stage("text_embedding"):
+        import_texts_embedding(transcribes, video_id)
+
+    cache.put("texts", key, {"count": len(transcribes)})
+
+    events.put(
+        {
+            "message": f"Imported {len(transcribes)} transcript chunks",
+            "timings": timer.timings,
+        }
+    )
+
+
+def video_downloader(url, video_id, cache, timer):
+    """
+    Returns a function that downloads the video on first call only, so a
+    fully cached import never downloads.
+    """
+    lock = threading.Lock()
+    key = stage_key(video_id, "download", {"stream": "highest_resolution"})
+
+    def validate(result):
+        path = result["output_path"]
+        return os.path.exists(path) and os.path.getsize(path) == result["size"]
+
+    def get_video_path():
+        with lock:
+            if (cached := cache.get("download", key, validate)) is not None:
+                return cached["output_path"]
+
+            with timer.stage("download"):
+                video_meta = download_video(
+                    url, video_id, cache.dir if cache.enabled else None
+                )
+
+            path = video_meta["output_path"]
+            cache.put(
+                "download",
+                key,
+                {"output_path": path, "size": os.path.getsize(path)},
+            )
+
+            return path
+
+    return get_video_path
+
+
+def get_video_id(url):
+    try:
+        video_id = url.split("=")[1].split("&")[0]
+    except Exception:
+        return str(uuid4())
+
+    # The id names the folders and files of the import
+    if not is_video_id(video_id):
+        raise ValueError(f"No valid video id in {url!r}")
+
+    return video_id
+
+
+def import_video_events(url, video_id):
+    """
+    Import a video, yielding progress events as dicts.
+
+    The frame branch (decode -> CLIP -> upsert) and the audio branch
+    (extract -> transcribe -> embed -> upsert) run concurrently. The video is
+    downloaded by whichever branch needs it first, and stages recorded in the
+    artifact cache with the same settings are skipped.
+    Every event carries the per-stage timings accumulated so far.
+    """
+    timer = StageTimer()
+    cache = ArtifactCache(video_id)
+
+    yield {"message": "Start processing"}
+
+    get_video_path = video_downloader(url, video_id, cache, timer)
+
+    yield {
+        "message": "Extracting frames and transcribing video",
+        "timings": timer.timings,
+    }
+
+    events = queue.Queue()
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        futures = [
+            executor.submit(
+                import_frames, get_video_path, video_id, cache, timer, events
+            ),
+            executor.submit(
+                import_transcript, get_video_path, video_id, cache, timer, events
+            ),
+        ]
+
+        while not all(future.done() for future in futures) or not events.empty():
+            try:
+                yield events.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+        for future in futures:
+            future.result()
+
+    # Answers cached before or during the import came from the old index
+    if ANSWER_CACHE:
+        get_answer_cache().invalidate(video_id)
+
+    yield {
+        "message": "Import Success!",
+        "video_id": video_id,
+        "timings": timer.timings,
+    }
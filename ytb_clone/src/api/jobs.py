@@ -0,0 +1,200 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from uuid import uuid4
+
+from ytb_clone.src.api.importer import get_video_id, import_video_events
+from ytb_clone.src.api.workers import import_executor
+from ytb_clone.src.config import JOBS_DB
+from ytb_clone.src.database.sqlite import closing_commit
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+ACTIVE = (QUEUED, RUNNING)
+
+
+class JobStore:
+    """
+    SQLite backed store of import jobs and their progress events.
+    """
+
+    def __init__(self, path=JOBS_DB):
+        self.path = path
+        self.lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+        with self.connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    video_id TEXT NOT NULL,
+                    url TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS job_events (
+                    job_id TEXT NOT NULL,
+                    seq INTEGER NOT NULL,
+                    data TEXT NOT NULL,
+                    PRIMARY KEY (job_id, seq)
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS jobs_video_id ON jobs (video_id, status)"
+            )
+
+    def connect(self):
+        conn = sqlite3.connect(self.path)
+        conn.row_factory = sqlite3.Row
+        return closing_commit(conn)
+
+    def create_or_get_active(self, url, video_id):
+        """
+        Create a queued job, unless one is already active for this video.
+
+        Returns:
+        Tuple[dict, bool]: The job and whether it was created.
+        """
+        with self.lock, self.connect() as conn:
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE video_id = ? AND status IN (?, ?)",
+                (video_id, *ACTIVE),
+            ).fetchone()
+
+            if row:
+                return dict(row), False
+
+            now = time.time()
+            job = {
+                "id": str(uuid4()),
+                "video_id": video_id,
+                "url": url,
+                "status": QUEUED,
+                "error": None,
+                "created_at": now,
+                "updated_at": now,
+            }
+            conn.execute(
+                "INSERT INTO jobs VALUES "
+                "(:id, :video_id, :url, :status, :error, :created_at, :updated_at)",
+                job,
+            )
+
+            return job, True
+
+    def get(self, job_id):
+        with self.connect() as conn:
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+
+        return dict(row) if row else None
+
+    def active(self):
+        with self.connect() as conn:
+            rows = conn.execute(
+                "SELECT * FROM jobs WHERE status IN (?, ?) ORDER BY created_at",
+                ACTIVE,
+            ).fetchall()
+
+        return [dict(row) for row in rows]
+
+    def set_status(self, job_id, status, error=None):
+        with self.lock, self.connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE id = ?",
+                (status, error, time.time(), job_id),
+            )
+
+    def add_event(self, job_id, event):
+        with self.lock, self.connect() as conn:
+            (seq,) = conn.execute(
+                "SELECT COALESCE(MAX(seq), -1) + 1 FROM job_events WHERE job_id = ?",
+                (job_id,),
+            ).fetchone()
+            conn.execute(
+                "INSERT INTO job_events VALUES (?, ?, ?)",
+                (job_id, seq, json.dumps(event)),
+            )
+
+        return seq
+
+    def events(self, job_id, after=-1):
+        with self.connect() as conn:
+            rows = conn.execute(
+                "SELECT seq, data FROM job_events WHERE job_id = ? AND seq > ? "
+                "ORDER BY seq",
+                (job_id, after),
+            ).fetchall()
+
+        return [(row["seq"], json.loads(row["data"])) for row in rows]
+
+
+class JobManager:
+    """
+    Runs import jobs on the bounded import pool.
+
+    Submitting a video that already has a queued or running job returns that
+    job instead of importing it twice.
+    """
+
+    def __init__(self, store=None, executor=import_executor):
+        self.store = store or JobStore()
+        self.executor = executor
+
+    def submit(self, url):
+        job, created = self.store.create_or_get_active(url, get_video_id(url))
+
+        if created:
+            self.executor.submit(self.run, job)
+
+        return job
+
+    def resume(self):
+        """
+        Re-enqueue jobs that were active when the process last stopped.
+        """
+        for job in self.store.active():
+            self.store.add_event(job["id"], {"message": "Resuming import"})
+            self.executor.submit(self.run, job)
+
+    def run(self, job):
+        job_id = job["id"]
+        self.store.set_status(job_id, RUNNING)
+
+        try:
+            for event in import_video_events(job["url"], job["video_id"]):
+                self.store.add_event(job_id, event)
+        except Exception as e:
+            print(f"Import job {job_id} failed: {e}")
+            self.store.add_event(job_id, {"message": f"Import failed: {e}"})
+            self.store.set_status(job_id, FAILED, str(e))
+            return
+
+        self.store.set_status(job_id, DONE)
+
+    def status(self, job_id):
+        job = self.store.get(job_id)
+
+        if job is None:
+            return None
+
+        events = self.store.events(job_id)
+        job["events"] = len(events)
+        job["last_event"] = events[-1][1] if events else None
+
+        return job
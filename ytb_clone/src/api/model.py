@@ -1,4 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, field_validator
+
+from ytb_clone.src.video_id import is_video_id
 
 
 class VidImportParams(BaseModel):
@@ -8,3 +10,12 @@ class VidImportParams(BaseModel):
 class VidQueryParams(BaseModel):
     video_id: str
     question: str
+    # Benchmarks turn it off to measure the full retrieval path
+    use_answer_cache: bool = True
+
+    @field_validator("video_id")
+    @classmethod
+    def check_video_id(cls, video_id):
+        if not is_video_id(video_id):
+            raise ValueError("not a video id")
+        return video_id
@@ -0,0 +1,122 @@
+import asyncio
+import time
+
+from ytb_clone.src.api.db import images_db, texts_db, video_filter
+from ytb_clone.src.api.workers import run_cpu
+from ytb_clone.src.config import (
+    QUERY_EMBEDDING_TIMEOUT,
+    QUERY_HNSW_EF,
+    QUERY_IMAGE_LIMIT,
+    QUERY_RETRIEVAL,
+    QUERY_SCORE_THRESHOLD,
+    QUERY_TEXT_LIMIT,
+)
+from ytb_clone.src.embedding.text.clip import get_embedding as clip_text_embedding
+from ytb_clone.src.embedding.text.openai import aget_embedding as text_embedding
+from ytb_clone.src.retrieval.bm25 import get_index
+from ytb_clone.src.retrieval.fusion import reciprocal_rank_fusion
+
+SEARCH_PARAMS = {
+    "score_threshold": QUERY_SCORE_THRESHOLD,
+    "with_payload": ["start", "end", "data"],
+    "hnsw_ef": QUERY_HNSW_EF,
+}
+
+
+async def timed(timings, name, awaitable):
+    start = time.time()
+    result = await awaitable
+    timings[name] = round(time.time() - start, 3)
+    return result
+
+
+def embed_question(question, timings):
+    """
+    Starts the ada-002 embedding of the question, shared by the answer cache
+    and the dense transcript search.
+    """
+    return asyncio.ensure_future(
+        timed(timings, "text_embedding", text_embedding([question]))
+    )
+
+
+async def dense_texts(video_id, question_emb, timings):
+    # Shielded, a hybrid timeout must not cancel the embedding for the cache
+    text_emb = (await asyncio.shield(question_emb))[0]
+    hits = await timed(
+        timings,
+        "texts_search",
+        texts_db.async_search(
+            text_emb, video_filter(video_id), limit=QUERY_TEXT_LIMIT, **SEARCH_PARAMS
+        ),
+    )
+    return [i.payload for i in hits]
+
+
+def sparse_texts(video_id, question):
+    index = get_index(video_id)
+
+    if index is None:
+        return []
+
+    return [payload for _, payload in index.search(question, QUERY_TEXT_LIMIT)]
+
+
+async def search_texts(
+    video_id, question, question_emb, timings, mode=QUERY_RETRIEVAL
+):
+    """
+    Transcript segments for a question, best first.
+
+    `mode` is "dense" (ada-002 + texts_db), "sparse" (BM25) or "hybrid"
+    (both, fused by reciprocal rank). Hybrid answers from BM25 alone when
+    the dense search fails or exceeds QUERY_EMBEDDING_TIMEOUT.
+    `question_emb` is the future of embed_question, None in sparse mode.
+    """
+    if mode == "dense":
+        return await dense_texts(video_id, question_emb, timings)
+
+    sparse = timed(
+        timings, "bm25_search", asyncio.to_thread(sparse_texts, video_id, question)
+    )
+
+    if mode == "sparse":
+        return await sparse
+
+    dense, sparse = await asyncio.gather(
+        asyncio.wait_for(
+            dense_texts(video_id, question_emb, timings), QUERY_EMBEDDING_TIMEOUT
+        ),
+        sparse,
+        return_exceptions=True,
+    )
+
+    if isinstance(sparse, BaseException):
+        raise sparse
+
+    # A slow or failing embedding API still gets an answer from BM25
+    if isinstance(dense, BaseException):
+        print(f"Dense transcript search failed, using BM25 only: {dense!r}")
+        return sparse
+
+    return reciprocal_rank_fusion([dense, sparse], limit=QUERY_TEXT_LIMIT)
+
+
+async def search_images(video_id, question, timings):
+    """
+    Frame payloads for a question through CLIP, best first.
+    """
+    clip_text_emb = (
+        await timed(timings, "clip_embedding", run_cpu(clip_text_embedding, [question]))
+    )[0]
+    hits = await timed(
+        timings,
+        "images_search",
+        images_db.async_search(
+            clip_text_emb,
+            video_filter(video_id),
+            limit=QUERY_IMAGE_LIMIT,
+            **SEARCH_PARAMS,
+        ),
+    )
+    return [i.payload for i in hits]
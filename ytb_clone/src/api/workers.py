@@ -0,0 +1,23 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from ytb_clone.src.config import CPU_WORKERS, IMPORT_WORKERS
+
+# Query-time CPU work (CLIP text encoding, frame encoding)
+cpu_executor = ThreadPoolExecutor(
+    max_workers=CPU_WORKERS, thread_name_prefix="cpu"
+)
+
+# Imports are long running, keep them off the query pool
+import_executor = ThreadPoolExecutor(
+    max_workers=IMPORT_WORKERS, thread_name_prefix="import"
+)
+
+
+async def run_cpu(fn, *args, **kwargs):
+    """
+    Run a blocking function on the CPU pool without blocking the event loop.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(cpu_executor, partial(fn, *args, **kwargs))
@@ -9,11 +9,16 @@ def import_video_stream(video_url):
     data = {"video_url": video_url}
     timeout = httpx.Timeout(60, connect=60.0)
 
-    with httpx.stream("POST", url=url, json=data, timeout=timeout) as r:
-        for chunk in r.iter_raw():  # or, for line in r.iter_lines():
-            chunk = str(chunk)[7:-5]
-            print(chunk)
-            yield chunk
+    job = httpx.post(url, json=data, timeout=timeout).json()
+
+    events_url = f"{url}/{job['job_id']}/events"
+
+    with httpx.stream("GET", url=events_url, timeout=timeout) as r:
+        for line in r.iter_lines():
+            if line.startswith("data:"):
+                chunk = line[len("data:"):]
+                print(chunk)
+                yield chunk
             
 def get_stream_response(question, video_id):
     url = "http://localhost:8001/query"
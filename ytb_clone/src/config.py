@@ -0,0 +1,152 @@
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv(".env")
+
+
+# Frame extraction
+FRAME_FPS = float(os.getenv("FRAME_FPS", "0.5"))
+FRAME_SEGMENTS = int(os.getenv("FRAME_SEGMENTS", "1"))
+
+# Frame deduplication, threshold is the max hamming distance (0-64) of the
+# perceptual hashes for two frames to be considered identical
+FRAME_DEDUP = os.getenv("FRAME_DEDUP", "true").lower() == "true"
+FRAME_DEDUP_THRESHOLD = int(os.getenv("FRAME_DEDUP_THRESHOLD", "6"))
+
+# Stream decoded frames straight into CLIP instead of a PNG round-trip,
+# frames are still persisted (for the vision model) as FRAME_FORMAT
+FRAME_STREAM = os.getenv("FRAME_STREAM", "true").lower() == "true"
+FRAME_PERSIST = os.getenv("FRAME_PERSIST", "true").lower() == "true"
+FRAME_FORMAT = os.getenv("FRAME_FORMAT", "jpg")
+FRAME_QUALITY = int(os.getenv("FRAME_QUALITY", "85"))
+
+# CLIP image embedding
+CLIP_BATCH_SIZE = int(os.getenv("CLIP_BATCH_SIZE", "32"))
+CLIP_PREPROCESS_WORKERS = int(
+    os.getenv("CLIP_PREPROCESS_WORKERS", str(os.cpu_count() or 1))
+)
+TORCH_THREADS = int(os.getenv("TORCH_THREADS", str(os.cpu_count() or 1)))
+
+# CLIP model, loaded once on first use or at startup when CLIP_WARMUP is set
+CLIP_MODEL = os.getenv("CLIP_MODEL", "ViT-B/32")
+CLIP_WARMUP = os.getenv("CLIP_WARMUP", "false").lower() == "true"
+
+# CLIP inference backend: "torch", "onnx" or "onnx-int8" (dynamic quantized)
+CLIP_BACKEND = os.getenv("CLIP_BACKEND", "torch")
+CLIP_ONNX_DIR = os.getenv("CLIP_ONNX_DIR", "data/onnx")
+
+# Qdrant upserts
+QDRANT_BATCH_SIZE = int(os.getenv("QDRANT_BATCH_SIZE", "256"))
+QDRANT_PARALLEL = int(os.getenv("QDRANT_PARALLEL", "4"))
+
+# API worker pools, CPU-bound work runs here instead of on the event loop
+CPU_WORKERS = int(os.getenv("CPU_WORKERS", "4"))
+IMPORT_WORKERS = int(os.getenv("IMPORT_WORKERS", "2"))
+
+# Import jobs
+JOBS_DB = os.getenv("JOBS_DB", "data/jobs.db")
+
+# Audio is decoded straight from the video into 16 kHz mono chunks, with at
+# most TRANSCRIBE_QUEUE_DEPTH chunks decoded but not yet transcribed
+AUDIO_STREAM = os.getenv("AUDIO_STREAM", "true").lower() == "true"
+AUDIO_SAMPLE_RATE = int(os.getenv("AUDIO_SAMPLE_RATE", "16000"))
+AUDIO_CHUNK_DURATION = int(os.getenv("AUDIO_CHUNK_DURATION", "30"))
+TRANSCRIBE_WORKERS = int(os.getenv("TRANSCRIBE_WORKERS", "8"))
+TRANSCRIBE_QUEUE_DEPTH = int(os.getenv("TRANSCRIBE_QUEUE_DEPTH", "16"))
+
+# Voice activity detection, cuts audio at pauses and skips non-speech
+TRANSCRIBE_VAD = os.getenv("TRANSCRIBE_VAD", "true").lower() == "true"
+VAD_THRESHOLD_DB = float(os.getenv("VAD_THRESHOLD_DB", "-40"))
+VAD_MIN_SILENCE = float(os.getenv("VAD_MIN_SILENCE", "0.5"))
+VAD_MIN_SPEECH = float(os.getenv("VAD_MIN_SPEECH", "0.3"))
+VAD_PADDING = float(os.getenv("VAD_PADDING", "0.2"))
+# Speech cut at AUDIO_CHUNK_DURATION without a pause repeats this many seconds
+# at the start of the next segment, so words on the cut are heard whole once
+VAD_CUT_OVERLAP = float(os.getenv("VAD_CUT_OVERLAP", "1.0"))
+
+# Transcription backend: "whisper-api", "local" (faster-whisper, int8 on CPU)
+# or "fake" (deterministic, offline)
+TRANSCRIBE_BACKEND = os.getenv("TRANSCRIBE_BACKEND", "whisper-api")
+LOCAL_WHISPER_MODEL = os.getenv("LOCAL_WHISPER_MODEL", "small")
+LOCAL_WHISPER_WORKERS = int(os.getenv("LOCAL_WHISPER_WORKERS", "2"))
+LOCAL_WHISPER_THREADS = int(
+    os.getenv(
+        "LOCAL_WHISPER_THREADS",
+        str(max(1, (os.cpu_count() or 1) // LOCAL_WHISPER_WORKERS)),
+    )
+)
+
+# Failed transcription chunks are retried with exponential backoff
+TRANSCRIBE_RETRIES = int(os.getenv("TRANSCRIBE_RETRIES", "3"))
+TRANSCRIBE_BACKOFF = float(os.getenv("TRANSCRIBE_BACKOFF", "1.0"))
+# Keep the transcript in the import cache, a re-import reuses it
+TRANSCRIPT_PERSIST = os.getenv("TRANSCRIPT_PERSIST", "true").lower() == "true"
+
+# Per-stage import artifacts, a repeated import skips every completed stage
+IMPORT_CACHE = os.getenv("IMPORT_CACHE", "true").lower() == "true"
+IMPORT_CACHE_DIR = os.getenv("IMPORT_CACHE_DIR", "data/cache")
+
+# Embedding cache, in-process LRU plus an optional SQLite store ("" disables it)
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "10000"))
+EMBEDDING_CACHE_DB = os.getenv("EMBEDDING_CACHE_DB", "data/embeddings.db")
+
+# Frames up to this many seconds outside a transcript segment still belong to it
+QUERY_JOIN_TOLERANCE = float(os.getenv("QUERY_JOIN_TOLERANCE", "0"))
+
+# JPEG thumbnails of frames for the vision model, made at import time
+THUMBNAIL_SIZE = int(os.getenv("THUMBNAIL_SIZE", "512"))
+THUMBNAIL_QUALITY = int(os.getenv("THUMBNAIL_QUALITY", "80"))
+THUMBNAIL_CACHE_SIZE = int(os.getenv("THUMBNAIL_CACHE_SIZE", "1024"))
+THUMBNAIL_WORKERS = int(os.getenv("THUMBNAIL_WORKERS", "4"))
+
+# Vector search
+IMAGE_VECTOR_SIZE = int(os.getenv("IMAGE_VECTOR_SIZE", "512"))
+TEXT_VECTOR_SIZE = int(os.getenv("TEXT_VECTOR_SIZE", "1536"))
+QUERY_TEXT_LIMIT = int(os.getenv("QUERY_TEXT_LIMIT", "5"))
+QUERY_IMAGE_LIMIT = int(os.getenv("QUERY_IMAGE_LIMIT", "5"))
+QUERY_SCORE_THRESHOLD = (
+    float(os.environ["QUERY_SCORE_THRESHOLD"])
+    if os.getenv("QUERY_SCORE_THRESHOLD")
+    else None
+)
+QUERY_HNSW_EF = int(os.getenv("QUERY_HNSW_EF", "0")) or None
+
+# Collection storage: QDRANT_QUANTIZATION is "none", "scalar" (int8) or
+# "product", quantized searches oversample then rescore with full vectors
+QDRANT_QUANTIZATION = os.getenv("QDRANT_QUANTIZATION", "none")
+QDRANT_ON_DISK = os.getenv("QDRANT_ON_DISK", "false").lower() == "true"
+QDRANT_MEMMAP_THRESHOLD = int(os.getenv("QDRANT_MEMMAP_THRESHOLD", "20000"))
+QDRANT_OVERSAMPLING = float(os.getenv("QDRANT_OVERSAMPLING", "2.0"))
+QDRANT_RESCORE = os.getenv("QDRANT_RESCORE", "true").lower() == "true"
+
+# Vector store: "qdrant" (server) or "local" (numpy flat index, per video)
+VECTOR_DB = os.getenv("VECTOR_DB", "qdrant")
+QDRANT_HOST = os.getenv("QDRANT_HOST", "localhost")
+QDRANT_PORT = int(os.getenv("QDRANT_PORT", "6333"))
+LOCAL_VECTOR_DIR = os.getenv("LOCAL_VECTOR_DIR", "data/vectors")
+
+# Transcript retrieval: "dense" (ada-002), "sparse" (BM25) or "hybrid" (both,
+# fused with reciprocal-rank fusion). Hybrid answers from BM25 alone when the
+# question embedding fails or takes longer than QUERY_EMBEDDING_TIMEOUT seconds.
+QUERY_RETRIEVAL = os.getenv("QUERY_RETRIEVAL", "hybrid")
+QUERY_EMBEDDING_TIMEOUT = float(os.getenv("QUERY_EMBEDDING_TIMEOUT", "3"))
+RRF_K = int(os.getenv("RRF_K", "60"))
+BM25_DIR = os.getenv("BM25_DIR", "data/bm25")
+BM25_K1 = float(os.getenv("BM25_K1", "1.5"))
+BM25_B = float(os.getenv("BM25_B", "0.75"))
+
+# Prompt of the answer: tokens for system prompt + question + packed context,
+# segments overlapping a better ranked one by CONTEXT_SEGMENT_OVERLAP (of the
+# shorter) are merged into it. RESPONSE_MAX_TOKENS caps the answer.
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "6000"))
+CONTEXT_SEGMENT_OVERLAP = float(os.getenv("CONTEXT_SEGMENT_OVERLAP", "0.5"))
+RESPONSE_MAX_TOKENS = int(os.getenv("RESPONSE_MAX_TOKENS", "500"))
+
+# Answers of repeated questions: a question of the same video whose embedding
+# has cosine similarity >= ANSWER_CACHE_THRESHOLD replays the cached answer
+ANSWER_CACHE = os.getenv("ANSWER_CACHE", "true").lower() == "true"
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95"))
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", "86400"))
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "1000"))
+ANSWER_CACHE_DB = os.getenv("ANSWER_CACHE_DB", "data/answers.db")
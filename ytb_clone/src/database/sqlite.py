@@ -0,0 +1,12 @@
+from contextlib import closing
+
+
+class closing_commit(closing):
+    """
+    Commit on success and always close, sqlite3's own context manager only commits.
+    """
+
+    def __exit__(self, exc_type, *args):
+        if exc_type is None:
+            self.thing.commit()
+        return super().__exit__(exc_type, *args)
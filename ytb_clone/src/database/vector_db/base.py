@@ -0,0 +1,65 @@
+import asyncio
+from abc import ABC, abstractmethod
+
+
+class VectorDB(ABC):
+    """
+    Interface of the vector stores, filters are qdrant_client `models.Filter`.
+    """
+
+    collection: str
+
+    @abstractmethod
+    def search(
+        self,
+        embedding,
+        filter=None,
+        limit=5,
+        score_threshold=None,
+        with_payload=True,
+        **search_params,
+    ):
+        """
+        Returns the nearest points as `models.ScoredPoint`, best first.
+        """
+
+    async def async_search(self, embedding, filter=None, **kwargs):
+        return await asyncio.to_thread(self.search, embedding, filter, **kwargs)
+
+    @abstractmethod
+    def batch_insert(self, vectors, payloads, **kwargs):
+        """
+        Inserts vectors with their payloads, returns the new point ids.
+        """
+
+    def insert(self, vector, payload):
+        return self.batch_insert([vector], [payload])[0]
+
+    def split_insert(self, embeddings, payload):
+        return self.batch_insert(embeddings, [payload] * len(embeddings))
+
+    @abstractmethod
+    def count(self, filter=None):
+        pass
+
+    @abstractmethod
+    def clear(self, filters):
+        pass
+
+    @abstractmethod
+    def ensure_collection(self, vector_size, **kwargs):
+        pass
+
+
+def filter_video_id(filter):
+    """
+    The `video_id` a filter matches on, None when it does not filter on it.
+    """
+    if filter is None:
+        return None
+
+    for condition in filter.must or []:
+        if getattr(condition, "key", None) == "video_id":
+            return condition.match.value
+
+    return None
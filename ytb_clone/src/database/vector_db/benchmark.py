@@ -0,0 +1,125 @@
+"""
+Recall vs latency of the collection storage modes on a synthetic corpus.
+
+    python -m ytb_clone.src.database.vector_db.benchmark --points 100000 --dim 512
+
+Needs a running Qdrant, every mode gets its own temporary collection.
+Recall@k is measured against exact brute-force cosine search with numpy.
+"""
+import argparse
+import time
+
+import numpy as np
+from qdrant_client import models
+
+from ytb_clone.src.database.vector_db.qdrant import QdrantDB
+
+MODES = {
+    "float32": {"quantization": "none", "on_disk": False},
+    "float32 on disk": {"quantization": "none", "on_disk": True},
+    "scalar": {"quantization": "scalar", "on_disk": False},
+    "scalar on disk": {"quantization": "scalar", "on_disk": True},
+    "product": {"quantization": "product", "on_disk": False},
+}
+
+
+def synthetic_corpus(points, dim, videos, seed=0):
+    """
+    Clustered unit vectors, like frames of the same video that look alike.
+    """
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(points // 50 + 1, dim))
+
+    vectors = centers[rng.integers(0, len(centers), points)]
+    vectors = vectors + 0.3 * rng.normal(size=(points, dim))
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    video_ids = rng.integers(0, videos, points)
+
+    return vectors.astype(np.float32), video_ids
+
+
+def wait_indexed(db):
+    while db.client.get_collection(db.collection).status != models.CollectionStatus.GREEN:
+        time.sleep(1)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=6333)
+    parser.add_argument("--points", type=int, default=50000)
+    parser.add_argument("--dim", type=int, default=512)
+    parser.add_argument("--videos", type=int, default=100)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--oversampling", type=float, nargs="+", default=[1.0, 2.0, 4.0])
+    args = parser.parse_args()
+
+    vectors, video_ids = synthetic_corpus(args.points, args.dim, args.videos)
+    payloads = [{"video_id": str(v)} for v in video_ids]
+
+    rng = np.random.default_rng(1)
+    query_ids = rng.integers(0, args.points, args.queries)
+    queries = vectors[query_ids] + 0.1 * rng.normal(size=(args.queries, args.dim))
+    queries = (queries / np.linalg.norm(queries, axis=1, keepdims=True)).astype(
+        np.float32
+    )
+
+    # Exact top-k within the query's video
+    truth = []
+    for query, point in zip(queries, query_ids):
+        candidates = np.flatnonzero(video_ids == video_ids[point])
+        scores = vectors[candidates] @ query
+        truth.append(set(candidates[np.argsort(-scores)[: args.limit]].tolist()))
+
+    print(f"{'mode':<18}{'oversampling':>14}{'recall@k':>10}{'p50 ms':>9}{'p95 ms':>9}")
+
+    for name, mode in MODES.items():
+        db = QdrantDB(f"benchmark_{name.replace(' ', '_')}", args.host, args.port)
+        db.client.delete_collection(db.collection)
+        db.ensure_collection(args.dim, **mode)
+
+        ids = db.batch_insert(vectors, payloads)
+        index_of = {point_id: i for i, point_id in enumerate(ids)}
+        wait_indexed(db)
+
+        oversamplings = args.oversampling if mode["quantization"] != "none" else [1.0]
+
+        for oversampling in oversamplings:
+            latencies = []
+            recall = 0
+
+            for query, point, expected in zip(queries, query_ids, truth):
+                video_filter = models.Filter(
+                    must=[
+                        models.FieldCondition(
+                            key="video_id",
+                            match=models.MatchValue(value=str(video_ids[point])),
+                        )
+                    ]
+                )
+
+                start = time.perf_counter()
+                hits = db.search(
+                    query,
+                    video_filter,
+                    limit=args.limit,
+                    with_payload=False,
+                    oversampling=oversampling,
+                )
+                latencies.append((time.perf_counter() - start) * 1000)
+
+                found = {index_of[hit.id] for hit in hits}
+                recall += len(found & expected) / len(expected)
+
+            print(
+                f"{name:<18}{oversampling:>14.1f}{recall / len(queries):>10.3f}"
+                f"{np.percentile(latencies, 50):>9.2f}{np.percentile(latencies, 95):>9.2f}"
+            )
+
+        db.client.delete_collection(db.collection)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+import json
+import os
+import threading
+import uuid
+
+import numpy as np
+from qdrant_client import models
+
+from ytb_clone.src.config import LOCAL_VECTOR_DIR
+from ytb_clone.src.database.vector_db.base import VectorDB, filter_video_id
+from ytb_clone.src.video_id import video_path
+
+
+def replace_file(path, write):
+    """
+    Write a file through a temporary one, readers never see it half written.
+    """
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        write(f)
+    os.replace(tmp_path, path)
+
+
+class Partition:
+    """
+    Vectors of one video, L2-normalised so cosine similarity is a dot product.
+
+    Added vectors stay in memory until `flush`, which rewrites the partition
+    once per import instead of once per batch.
+    """
+
+    def __init__(self, folder):
+        self.folder = folder
+        self.vectors = None
+        self.pending = []
+        self.ids = []
+        self.payloads = []
+
+        if os.path.exists(os.path.join(folder, "points.json")):
+            # Memory-mapped, the OS pages in only the videos that get searched
+            self.vectors = np.load(
+                os.path.join(folder, "vectors.npy"), mmap_mode="r"
+            )
+            with open(os.path.join(folder, "points.json")) as f:
+                points = json.load(f)
+            self.ids = points["ids"]
+            self.payloads = points["payloads"]
+
+            # vectors.npy is replaced first, a crash before points.json leaves
+            # extra vectors from an append that never completed
+            self.vectors = self.vectors[:len(self.ids)]
+
+    def add(self, vectors, ids, payloads):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        vectors = vectors / np.maximum(
+            np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12
+        )
+
+        self.pending.append(vectors)
+        self.ids = self.ids + ids
+        self.payloads = self.payloads + payloads
+
+    def matrix(self):
+        if self.pending:
+            parts = [] if self.vectors is None else [self.vectors]
+            self.vectors = np.concatenate(parts + self.pending)
+            self.pending = []
+
+        return self.vectors
+
+    def flush(self):
+        if not self.pending:
+            return
+
+        vectors = self.matrix()
+        os.makedirs(self.folder, exist_ok=True)
+
+        replace_file(
+            os.path.join(self.folder, "vectors.npy"), lambda f: np.save(f, vectors)
+        )
+        replace_file(
+            os.path.join(self.folder, "points.json"),
+            lambda f: f.write(
+                json.dumps({"ids": self.ids, "payloads": self.payloads}).encode()
+            ),
+        )
+
+    def search(self, query, limit):
+        if len(self.ids) == 0:
+            return []
+
+        scores = self.matrix() @ query
+        limit = min(limit, len(scores))
+        top = np.argpartition(-scores, limit - 1)[:limit]
+        top = top[np.argsort(-scores[top])]
+
+        return [(float(scores[i]), i) for i in top]
+
+
+class LocalVectorDB(VectorDB):
+    """
+    Embedded flat index, for single-node installs and tests.
+
+    Points are partitioned per `video_id` into memory-mapped numpy arrays
+    under `path/collection/`, so a search filtered on a video only reads
+    that video's vectors.
+    """
+
+    def __init__(self, collection, path=LOCAL_VECTOR_DIR) -> None:
+        self.collection = collection
+        self.folder = os.path.join(path, collection)
+        self.partitions = {}
+        self.lock = threading.Lock()
+
+    def _partition_folder(self, video_id):
+        return video_path(self.folder, video_id)
+
+    def _partition(self, video_id):
+        if video_id not in self.partitions:
+            self.partitions[video_id] = Partition(self._partition_folder(video_id))
+
+        return self.partitions[video_id]
+
+    def _video_ids(self, filter):
+        video_id = filter_video_id(filter)
+
+        if video_id is not None:
+            return [video_id]
+
+        if not os.path.exists(self.folder):
+            return list(self.partitions)
+
+        return sorted(set(os.listdir(self.folder)) | set(self.partitions))
+
+    def search(
+        self,
+        embedding,
+        filter=None,
+        limit=5,
+        score_threshold=None,
+        with_payload=True,
+        **search_params,
+    ):
+        query = np.asarray(embedding, dtype=np.float32)
+        query = query / max(np.linalg.norm(query), 1e-12)
+
+        hits = []
+        with self.lock:
+            for video_id in self._video_ids(filter):
+                partition = self._partition(video_id)
+
+                for score, i in partition.search(query, limit):
+                    payload = partition.payloads[i]
+
+                    if isinstance(with_payload, list):
+                        payload = {k: payload.get(k) for k in with_payload}
+                    elif not with_payload:
+                        payload = None
+
+                    hits.append(
+                        models.ScoredPoint(
+                            id=partition.ids[i], version=0, score=score, payload=payload
+                        )
+                    )
+
+        if score_threshold is not None:
+            hits = [hit for hit in hits if hit.score >= score_threshold]
+
+        return sorted(hits, key=lambda hit: -hit.score)[:limit]
+
+    def batch_insert(self, vectors, payloads, wait=True, **kwargs):
+        """
+        Like Qdrant's `wait`, points are searchable right away but only
+        written to disk by an insert that waits, the streamed import waits on
+        its last batch only.
+        """
+        points_ids = [str(uuid.uuid4()) for _ in payloads]
+
+        by_video = {}
+        for i, payload in enumerate(payloads):
+            by_video.setdefault(payload.get("video_id"), []).append(i)
+
+        vectors = np.asarray(vectors, dtype=np.float32)
+
+        with self.lock:
+            for video_id, indices in by_video.items():
+                self._partition(video_id).add(
+                    vectors[indices],
+                    [points_ids[i] for i in indices],
+                    [payloads[i] for i in indices],
+                )
+
+            if wait:
+                for partition in self.partitions.values():
+                    partition.flush()
+
+        return points_ids
+
+    def count(self, filter=None):
+        with self.lock:
+            return sum(
+                len(self._partition(video_id).ids)
+                for video_id in self._video_ids(filter)
+            )
+
+    def clear(self, filters):
+        video_id = filter_video_id(filters)
+
+        if video_id is None:
+            raise ValueError("LocalVectorDB only clears whole videos")
+
+        with self.lock:
+            self.partitions.pop(video_id, None)
+            folder = self._partition_folder(video_id)
+
+            for file_name in ("vectors.npy", "points.json"):
+                if os.path.exists(os.path.join(folder, file_name)):
+                    os.remove(os.path.join(folder, file_name))
+
+    def ensure_collection(self, vector_size, **kwargs):
+        os.makedirs(self.folder, exist_ok=True)
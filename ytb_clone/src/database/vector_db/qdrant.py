@@ -1,30 +1,194 @@
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 
-from qdrant_client import QdrantClient
+from qdrant_client import AsyncQdrantClient, QdrantClient, models
 from qdrant_client.http.models import Batch
 from qdrant_client.models import PointStruct
 from tqdm import tqdm
 
+from ytb_clone.src.config import (
+    QDRANT_BATCH_SIZE,
+    QDRANT_MEMMAP_THRESHOLD,
+    QDRANT_ON_DISK,
+    QDRANT_OVERSAMPLING,
+    QDRANT_PARALLEL,
+    QDRANT_QUANTIZATION,
+    QDRANT_RESCORE,
+)
+from ytb_clone.src.database.vector_db.base import VectorDB
 
-class QdrantDB:
+
+def quantization_configs():
+    # Quantized vectors are kept in RAM even when the full ones are on disk
+    return {
+        "none": None,
+        "scalar": models.ScalarQuantization(
+            scalar=models.ScalarQuantizationConfig(
+                type=models.ScalarType.INT8, quantile=0.99, always_ram=True
+            )
+        ),
+        "product": models.ProductQuantization(
+            product=models.ProductQuantizationConfig(
+                compression=models.CompressionRatio.X16, always_ram=True
+            )
+        ),
+    }
+
+
+def to_list(vectors):
+    # Embeddings may come as numpy arrays, the client expects plain lists
+    if hasattr(vectors, "tolist"):
+        return vectors.tolist()
+
+    return vectors
+
+
+class QdrantDB(VectorDB):
     def __init__(self, collection, host, port=6333) -> None:
         self.host = host
         self.port = port
         self.collection = collection
 
         self.client = QdrantClient(host=self.host, port=self.port)
+        self.async_client = AsyncQdrantClient(host=self.host, port=self.port)
 
-    def search(self, embedding, filter=None):
-
-        hits = self.client.search(
+    def _search_params(
+        self,
+        embedding,
+        filter,
+        limit,
+        score_threshold,
+        with_payload,
+        hnsw_ef,
+        oversampling,
+        rescore,
+    ):
+        return dict(
             collection_name=self.collection,
-            query_vector=embedding,
-            limit=5,
+            query_vector=to_list(embedding),
+            limit=limit,
             query_filter=filter,
+            score_threshold=score_threshold,
+            with_payload=with_payload,
+            search_params=models.SearchParams(
+                hnsw_ef=hnsw_ef,
+                # Ignored by collections without quantization
+                quantization=models.QuantizationSearchParams(
+                    rescore=rescore, oversampling=oversampling
+                ),
+            ),
+        )
+
+    def search(
+        self,
+        embedding,
+        filter=None,
+        limit=5,
+        score_threshold=None,
+        with_payload=True,
+        hnsw_ef=None,
+        oversampling=QDRANT_OVERSAMPLING,
+        rescore=QDRANT_RESCORE,
+    ):
+        """
+        Search the nearest vectors.
+
+        limit (int): Max number of hits.
+        score_threshold (float): Drop hits scoring below this.
+        with_payload (bool | List[str]): Whether to return payloads, or which fields.
+        hnsw_ef (int): HNSW beam size, higher is more accurate and slower.
+        oversampling (float): On quantized collections, fetch limit * oversampling candidates.
+        rescore (bool): On quantized collections, re-rank candidates with the full vectors.
+        """
+        hits = self.client.search(
+            **self._search_params(
+                embedding,
+                filter,
+                limit,
+                score_threshold,
+                with_payload,
+                hnsw_ef,
+                oversampling,
+                rescore,
+            )
         )
 
         return hits
 
+    async def async_search(
+        self,
+        embedding,
+        filter=None,
+        limit=5,
+        score_threshold=None,
+        with_payload=True,
+        hnsw_ef=None,
+        oversampling=QDRANT_OVERSAMPLING,
+        rescore=QDRANT_RESCORE,
+    ):
+
+        hits = await self.async_client.search(
+            **self._search_params(
+                embedding,
+                filter,
+                limit,
+                score_threshold,
+                with_payload,
+                hnsw_ef,
+                oversampling,
+                rescore,
+            )
+        )
+
+        return hits
+
+    def ensure_collection(
+        self,
+        vector_size,
+        distance=models.Distance.COSINE,
+        quantization=QDRANT_QUANTIZATION,
+        on_disk=QDRANT_ON_DISK,
+        memmap_threshold=QDRANT_MEMMAP_THRESHOLD,
+    ):
+        """
+        Create the collection if it is missing, and index the `video_id`
+        payload every query filters on, so filtered search uses the index
+        instead of scanning every point.
+
+        quantization (str): "none", "scalar" (int8, 4x smaller) or "product" (16x smaller).
+        on_disk (bool): Keep the full vectors on disk (memmap), quantized ones stay in RAM.
+        memmap_threshold (int): Segment size in KB above which vectors are memmapped.
+
+        Existing collections get the quantization and memmap settings applied,
+        the vectors' on_disk flag only applies on creation.
+        """
+        quantization_config = quantization_configs()[quantization]
+        optimizers_config = models.OptimizersConfigDiff(
+            memmap_threshold=memmap_threshold if on_disk else None
+        )
+
+        if not self.client.collection_exists(self.collection):
+            self.client.create_collection(
+                collection_name=self.collection,
+                vectors_config=models.VectorParams(
+                    size=vector_size, distance=distance, on_disk=on_disk
+                ),
+                quantization_config=quantization_config,
+                optimizers_config=optimizers_config,
+            )
+        else:
+            self.client.update_collection(
+                collection_name=self.collection,
+                quantization_config=quantization_config or models.Disabled.DISABLED,
+                optimizers_config=optimizers_config,
+            )
+
+        self.client.create_payload_index(
+            collection_name=self.collection,
+            field_name="video_id",
+            field_schema=models.PayloadSchemaType.KEYWORD,
+        )
+
     def split_insert(self, embeddings, payload):
         payloads = []
 
@@ -35,20 +199,63 @@ class QdrantDB:
 
         return points_ids
 
-    def batch_insert(self, vectors, payloads):
+    def batch_insert(
+        self,
+        vectors,
+        payloads,
+        batch_size=QDRANT_BATCH_SIZE,
+        parallel=QDRANT_PARALLEL,
+        wait=True,
+    ):
+        """
+        Upsert vectors in batches, with up to `parallel` batches in flight.
+
+        Every batch but the last is sent with wait=False. When `wait` is set
+        the last batch is sent after the others are acknowledged and waits for
+        indexing, updates of a collection are applied in order so every point
+        is searchable once it returns.
+        """
+        vectors = to_list(vectors)
         points_ids = []
         for _ in vectors:
             points_ids.append(str(uuid.uuid4()))
 
-        self.client.upsert(
-            self.collection,
-            points=Batch.model_construct(
-                ids=points_ids, vectors=vectors, payloads=payloads
-            ),
-        )
+        batches = []
+        for i in range(0, len(points_ids), batch_size):
+            end = i + batch_size
+            batches.append(
+                Batch.model_construct(
+                    ids=points_ids[i:end],
+                    vectors=vectors[i:end],
+                    payloads=payloads[i:end],
+                )
+            )
+
+        if not batches:
+            return points_ids
+
+        *head, last = batches
+
+        with ThreadPoolExecutor(max_workers=max(1, parallel)) as executor:
+            futures = [
+                executor.submit(
+                    self.client.upsert, self.collection, points=batch, wait=False
+                )
+                for batch in head
+            ]
+
+            for future in futures:
+                future.result()
+
+        self.client.upsert(self.collection, points=last, wait=wait)
 
         return points_ids
 
+    def count(self, filter=None):
+        return self.client.count(
+            collection_name=self.collection, count_filter=filter, exact=True
+        ).count
+
     def clear(self, filters):
         self.client.delete(
             collection_name=self.collection, points_selector=filters
@@ -56,12 +263,14 @@ class QdrantDB:
 
     def insert(self, vector, payload):
         point_id = str(uuid.uuid4())
-        i = self.client.upsert(
+        self.client.upsert(
             self.collection,
-            points=[PointStruct(id=point_id, vector=vector, payload=payload)],
+            points=[
+                PointStruct(id=point_id, vector=to_list(vector), payload=payload)
+            ],
         )
 
-        print(i)
+        return point_id
 
 
 if __name__ == "__main__":
@@ -0,0 +1,161 @@
+import os
+
+import clip
+import numpy as np
+import torch
+
+from ytb_clone.src.config import CLIP_ONNX_DIR
+
+
+class TorchClipBackend:
+    """
+    Runs the CLIP encoders with PyTorch.
+    """
+
+    def __init__(self, model, preprocess, device):
+        self.model = model
+        self.preprocess = preprocess
+        self.device = device
+        self.dim = model.visual.output_dim
+
+    def encode_image(self, images: torch.Tensor) -> np.ndarray:
+        with torch.inference_mode():
+            features = self.model.encode_image(images.to(self.device))
+
+        return features.float().cpu().numpy()
+
+    def encode_text(self, tokens: torch.Tensor) -> np.ndarray:
+        with torch.inference_mode():
+            features = self.model.encode_text(tokens.to(self.device))
+
+        return features.float().cpu().numpy()
+
+
+class _TextEncoder(torch.nn.Module):
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, tokens):
+        return self.model.encode_text(tokens)
+
+
+class _ImageEncoder(torch.nn.Module):
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, images):
+        return self.model.encode_image(images)
+
+
+def export_onnx(name: str, output_dir: str):
+    """
+    Export the CLIP image and text encoders to ONNX with a dynamic batch axis.
+
+    Args:
+        name (str): The CLIP model name, e.g. "ViT-B/32".
+        output_dir (str): Folder to write image.onnx and text.onnx to.
+
+    """
+    os.makedirs(output_dir, exist_ok=True)
+
+    # Export from an fp32 CPU copy, CUDA loads are fp16
+    model, _ = clip.load(name, device="cpu", jit=False)
+    model = model.float().eval()
+
+    resolution = model.visual.input_resolution
+
+    torch.onnx.export(
+        _ImageEncoder(model),
+        torch.randn(1, 3, resolution, resolution),
+        os.path.join(output_dir, "image.onnx"),
+        input_names=["images"],
+        output_names=["features"],
+        dynamic_axes={"images": {0: "batch"}, "features": {0: "batch"}},
+        opset_version=14,
+    )
+
+    torch.onnx.export(
+        _TextEncoder(model),
+        clip.tokenize(["a photo"]).long(),
+        os.path.join(output_dir, "text.onnx"),
+        input_names=["tokens"],
+        output_names=["features"],
+        dynamic_axes={"tokens": {0: "batch"}, "features": {0: "batch"}},
+        opset_version=14,
+    )
+
+
+def quantize_onnx(input_dir: str, output_dir: str):
+    """
+    Write int8 dynamic-quantized copies of the exported encoders.
+    """
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    os.makedirs(output_dir, exist_ok=True)
+
+    for file_name in ("image.onnx", "text.onnx"):
+        quantize_dynamic(
+            os.path.join(input_dir, file_name),
+            os.path.join(output_dir, file_name),
+            weight_type=QuantType.QInt8,
+        )
+
+
+class OnnxClipBackend:
+    """
+    Runs the CLIP encoders with ONNX Runtime on CPU, exporting them on first use.
+    """
+
+    def __init__(self, name, quantize=False, model_dir=CLIP_ONNX_DIR):
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise ImportError(
+                "The onnx CLIP backend needs `pip install onnx onnxruntime`"
+            ) from e
+
+        fp32_dir = os.path.join(model_dir, name.replace("/", "-"))
+        if not os.path.exists(os.path.join(fp32_dir, "text.onnx")):
+            export_onnx(name, fp32_dir)
+
+        self.model_dir = fp32_dir
+        if quantize:
+            self.model_dir = os.path.join(fp32_dir, "int8")
+            if not os.path.exists(os.path.join(self.model_dir, "text.onnx")):
+                quantize_onnx(fp32_dir, self.model_dir)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = (
+            ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        )
+
+        self.image_session = ort.InferenceSession(
+            os.path.join(self.model_dir, "image.onnx"),
+            options,
+            providers=["CPUExecutionProvider"],
+        )
+        self.text_session = ort.InferenceSession(
+            os.path.join(self.model_dir, "text.onnx"),
+            options,
+            providers=["CPUExecutionProvider"],
+        )
+
+        resolution = self.image_session.get_inputs()[0].shape[2]
+        self.preprocess = clip.clip._transform(resolution)
+        self.dim = self.image_session.get_outputs()[0].shape[1]
+
+    def encode_image(self, images: torch.Tensor) -> np.ndarray:
+        (features,) = self.image_session.run(
+            None, {"images": images.cpu().numpy().astype(np.float32)}
+        )
+
+        return features
+
+    def encode_text(self, tokens: torch.Tensor) -> np.ndarray:
+        (features,) = self.text_session.run(
+            None, {"tokens": tokens.cpu().numpy().astype(np.int64)}
+        )
+
+        return features
@@ -0,0 +1,201 @@
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from functools import wraps
+from typing import List
+
+import numpy as np
+
+from ytb_clone.src.config import EMBEDDING_CACHE_DB, EMBEDDING_CACHE_SIZE
+from ytb_clone.src.database.sqlite import closing_commit
+
+
+class EmbeddingCache:
+    """
+    Embeddings of one model keyed by text hash, kept as float32 arrays in an
+    in-process LRU and optionally persisted to SQLite.
+    """
+
+    def __init__(self, model, max_size=EMBEDDING_CACHE_SIZE, path=EMBEDDING_CACHE_DB):
+        self.model = model
+        self.max_size = max_size
+        self.path = path
+
+        self.lru = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+            with self.connect() as conn:
+                conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS embeddings (
+                        model TEXT NOT NULL,
+                        key TEXT NOT NULL,
+                        vector BLOB NOT NULL,
+                        PRIMARY KEY (model, key)
+                    )
+                    """
+                )
+
+    def connect(self):
+        return closing_commit(sqlite3.connect(self.path, timeout=30))
+
+    @staticmethod
+    def key(text):
+        return hashlib.sha256(text.encode()).hexdigest()
+
+    def _remember(self, key, vector):
+        self.lru[key] = vector
+        self.lru.move_to_end(key)
+
+        while len(self.lru) > self.max_size:
+            self.lru.popitem(last=False)
+
+    def get_many(self, texts):
+        """
+        Returns the cached vector of every text as a float32 array, None for
+        misses.
+        """
+        keys = [self.key(text) for text in texts]
+        result = {}
+
+        with self.lock:
+            for key in keys:
+                if key in self.lru:
+                    self.lru.move_to_end(key)
+                    result[key] = self.lru[key]
+
+        missing = [key for key in dict.fromkeys(keys) if key not in result]
+
+        if self.path and missing:
+            with self.connect() as conn:
+                rows = conn.execute(
+                    "SELECT key, vector FROM embeddings WHERE model = ? AND key IN "
+                    f"({', '.join('?' * len(missing))})",
+                    (self.model, *missing),
+                ).fetchall()
+
+            with self.lock:
+                for key, vector in rows:
+                    result[key] = np.frombuffer(vector, dtype=np.float32)
+                    self._remember(key, result[key])
+
+        with self.lock:
+            for key in keys:
+                if key not in result:
+                    self.misses += 1
+                elif key in missing:
+                    self.disk_hits += 1
+                else:
+                    self.hits += 1
+
+        return [result.get(key) for key in keys]
+
+    def put_many(self, texts, vectors):
+        keys = [self.key(text) for text in texts]
+        vectors = [np.asarray(vector, dtype=np.float32) for vector in vectors]
+
+        with self.lock:
+            for key, vector in zip(keys, vectors):
+                self._remember(key, vector)
+
+        if self.path:
+            with self.connect() as conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?)",
+                    [
+                        (self.model, key, vector.tobytes())
+                        for key, vector in zip(keys, vectors)
+                    ],
+                )
+
+    def stats(self):
+        with self.lock:
+            return {
+                "size": len(self.lru),
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+            }
+
+
+caches = {}
+_lock = threading.Lock()
+
+
+def get_cache(model):
+    with _lock:
+        if model not in caches:
+            caches[model] = EmbeddingCache(model)
+
+    return caches[model]
+
+
+def stats():
+    return {model: cache.stats() for model, cache in caches.items()}
+
+
+def _split(cache, texts):
+    cached = cache.get_many(texts)
+    # Unique texts only, duplicates in one call are embedded once
+    missing = list(dict.fromkeys(t for t, v in zip(texts, cached) if v is None))
+    return cached, missing
+
+
+def _merge(cache, texts, cached, missing, vectors):
+    if missing:
+        cache.put_many(missing, vectors)
+
+    computed = dict(zip(missing, vectors))
+
+    return [
+        vector.tolist() if vector is not None else list(computed[text])
+        for text, vector in zip(texts, cached)
+    ]
+
+
+def cached_embedding(model):
+    """
+    Decorate a `texts -> embeddings` function with the cache of `model`.
+    """
+
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(texts: List[str]) -> List[List[float]]:
+            cache = get_cache(model)
+            cached, missing = _split(cache, texts)
+            vectors = fn(missing) if missing else []
+            return _merge(cache, texts, cached, missing, vectors)
+
+        return wrapper
+
+    return decorator
+
+
+def async_cached_embedding(model):
+    """
+    Async version of cached_embedding.
+    """
+
+    def decorator(fn):
+        @wraps(fn)
+        async def wrapper(texts: List[str]) -> List[List[float]]:
+            cache = get_cache(model)
+            # The SQLite store may wait on import writers, not on the event loop
+            cached, missing = await asyncio.to_thread(_split, cache, texts)
+            vectors = await fn(missing) if missing else []
+            return await asyncio.to_thread(
+                _merge, cache, texts, cached, missing, vectors
+            )
+
+        return wrapper
+
+    return decorator
@@ -1,50 +1,95 @@
 import torch
-import clip
+import numpy as np
 from PIL import Image
 from typing import List
+from concurrent.futures import ThreadPoolExecutor
 
-device = "cuda" if torch.cuda.is_available() else "cpu"
-model, preprocess = clip.load("ViT-B/32", device=device)
+from ytb_clone.src.config import CLIP_BATCH_SIZE, CLIP_PREPROCESS_WORKERS
+from ytb_clone.src.embedding.registry import get_clip_encoder
 
+# PIL resize/convert release the GIL, so threads are enough for preprocessing
+preprocess_executor = ThreadPoolExecutor(max_workers=CLIP_PREPROCESS_WORKERS)
 
-def get_embedding(image_paths: List[str]) -> List[List[float]]:
+
+def get_embedding(
+    image_paths: List[str], batch_size: int = CLIP_BATCH_SIZE
+) -> np.ndarray:
     """
     Retrieves embeddings for a list of image paths using the CLIP model.
 
     Args:
         image_paths (List[str]): A list of paths to the images for which embeddings need to be generated.
+        batch_size (int): Number of images encoded per forward pass.
 
     Returns:
-        List[List[float]]: A list of embeddings, where each embedding is a list of floats.
+        np.ndarray: A contiguous float32 array of shape (len(image_paths), 512).
+
+    """
+    return encode_batches(image_paths, load_image, batch_size)
 
+
+def get_frames_embedding(
+    frames: List[np.ndarray], batch_size: int = CLIP_BATCH_SIZE
+) -> np.ndarray:
     """
-    if len(image_paths) > 8:
-        chunks = [
-            image_paths[i : i + 8] for i in range(0, len(image_paths), 8)
-        ]
-        embeddings = []
-        for chunk in chunks:
-            chunk_embeddings = process_chunk(chunk)
-            embeddings.extend(chunk_embeddings)
-        return embeddings
-    else:
-        return process_chunk(image_paths)
+    Retrieves embeddings for decoded video frames without going through disk.
+
+    Args:
+        frames (List[np.ndarray]): BGR frames as returned by OpenCV.
+        batch_size (int): Number of frames encoded per forward pass.
+
+    Returns:
+        np.ndarray: A contiguous float32 array of shape (len(frames), 512).
+
+    """
+    return encode_batches(frames, load_frame, batch_size)
+
 
+def load_image(image_path: str) -> torch.Tensor:
+    with Image.open(image_path) as image:
+        return get_clip_encoder().preprocess(image)
 
-def process_chunk(chunk: List[str]) -> List[List[float]]:
-    images = [Image.open(i) for i in chunk]
-    images = [preprocess(i).to(device) for i in images]
-    images = torch.stack(images)
 
-    with torch.no_grad():
-        features = model.encode_image(images)
+def load_frame(frame: np.ndarray) -> torch.Tensor:
+    return get_clip_encoder().preprocess(Image.fromarray(frame[:, :, ::-1]))
 
-    return features.tolist()
+
+def encode_batches(items, loader, batch_size: int) -> np.ndarray:
+    embeddings = [
+        process_chunk(items[i : i + batch_size], loader)
+        for i in range(0, len(items), batch_size)
+    ]
+
+    if not embeddings:
+        return np.empty((0, get_clip_encoder().dim), dtype=np.float32)
+
+    return np.ascontiguousarray(np.concatenate(embeddings), dtype=np.float32)
+
+
+def process_chunk(chunk, loader=load_image) -> np.ndarray:
+    images = list(preprocess_executor.map(loader, chunk))
+
+    return get_clip_encoder().encode_image(torch.stack(images))
 
 
 if __name__ == "__main__":
-    image_path = "/Users/sangtnguyen/Coding/Personal/youtube-clone/ytb-clone/test/frames/frame0177.png"
-    embedding = get_embedding([image_path, image_path])
+    import time
+
+    # Throughput benchmark: images/sec vs batch size on synthetic frames
+    frames = [
+        np.random.randint(0, 255, (720, 1280, 3), dtype=np.uint8)
+        for _ in range(128)
+    ]
+
+    get_frames_embedding(frames[:8], batch_size=8)  # warm up
+
+    for batch_size in (1, 8, 16, 32, 64, 128):
+        start = time.time()
+        embedding = get_frames_embedding(frames, batch_size=batch_size)
+        elapsed = time.time() - start
+
+        print(
+            f"batch_size={batch_size:4d}: {len(frames) / elapsed:.1f} images/sec"
+        )
 
-    print(embedding)
-    print(len(embedding))
+    print(embedding.shape, embedding.dtype)
@@ -0,0 +1,97 @@
+import threading
+
+import clip
+import torch
+
+from ytb_clone.src.config import CLIP_BACKEND, CLIP_MODEL, TORCH_THREADS
+from ytb_clone.src.embedding.backend import OnnxClipBackend, TorchClipBackend
+
+device = "cuda" if torch.cuda.is_available() else "cpu"
+
+_models = {}
+_encoders = {}
+_lock = threading.RLock()
+
+
+def get_clip_model(name: str = CLIP_MODEL):
+    """
+    Returns the CLIP model and its preprocess transform, loading it on first use.
+
+    The same instance is shared by the text and image encoders, so the
+    weights are only held in memory once per process.
+
+    Args:
+        name (str): The CLIP model name, e.g. "ViT-B/32".
+
+    Returns:
+        Tuple[torch.nn.Module, Callable]: The model and the image preprocess transform.
+
+    """
+    if name not in _models:
+        with _lock:
+            if name not in _models:
+                if device == "cpu":
+                    torch.set_num_threads(TORCH_THREADS)
+
+                model, preprocess = clip.load(name, device=device)
+                model.eval()
+                _models[name] = (model, preprocess)
+
+    return _models[name]
+
+
+def get_clip_encoder(name: str = CLIP_MODEL, backend: str = CLIP_BACKEND):
+    """
+    Returns the CLIP encoder for the configured backend, creating it on first use.
+
+    Args:
+        name (str): The CLIP model name, e.g. "ViT-B/32".
+        backend (str): "torch", "onnx" or "onnx-int8".
+
+    Returns:
+        The encoder, exposing preprocess, dim, encode_image and encode_text.
+
+    """
+    key = (name, backend)
+
+    if key not in _encoders:
+        with _lock:
+            if key not in _encoders:
+                if backend == "torch":
+                    model, preprocess = get_clip_model(name)
+                    encoder = TorchClipBackend(model, preprocess, device)
+                elif backend in ("onnx", "onnx-int8"):
+                    encoder = OnnxClipBackend(
+                        name, quantize=backend == "onnx-int8"
+                    )
+                else:
+                    raise ValueError(f"Unknown CLIP backend: {backend}")
+
+                _encoders[key] = encoder
+
+    return _encoders[key]
+
+
+def warmup(name: str = CLIP_MODEL):
+    """
+    Load the model eagerly, e.g. at API startup.
+    """
+    get_clip_encoder(name)
+
+
+if __name__ == "__main__":
+    import resource
+    import time
+
+    def rss_mb():
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    print(f"RSS before load: {rss_mb():.0f} MB")
+
+    start = time.time()
+    get_clip_model()
+    print(f"First load: {time.time() - start:.2f}s, RSS: {rss_mb():.0f} MB")
+
+    start = time.time()
+    get_clip_model()
+    print(f"Second load: {time.time() - start:.4f}s, RSS: {rss_mb():.0f} MB")
@@ -1,12 +1,12 @@
-import torch
 import clip
-from PIL import Image
 from typing import List
 
-device = "cuda" if torch.cuda.is_available() else "cpu"
-model, preprocess = clip.load("ViT-B/32", device=device)
+from ytb_clone.src.config import CLIP_BACKEND, CLIP_MODEL
+from ytb_clone.src.embedding.cache import cached_embedding
+from ytb_clone.src.embedding.registry import get_clip_encoder
 
 
+@cached_embedding(f"clip:{CLIP_MODEL}:{CLIP_BACKEND}")
 def get_embedding(texts) -> List[List[float]]:
     """
     Retrieves embeddings for a list of image paths using the CLIP model.
@@ -31,12 +31,9 @@ def get_embedding(texts) -> List[List[float]]:
 
 
 def process_chunk(chunk: List[str]) -> List[List[float]]:
-    texts = clip.tokenize(chunk).to(device)
+    texts = clip.tokenize(chunk)
 
-    with torch.no_grad():
-        features = model.encode_text(texts)
-
-    return features.tolist()
+    return get_clip_encoder().encode_text(texts).tolist()
 
 
 if __name__ == "__main__":
@@ -1,9 +1,15 @@
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 from typing import List
 
+from ytb_clone.src.embedding.cache import async_cached_embedding, cached_embedding
+
+MODEL = "text-embedding-ada-002"
+
 client = OpenAI()
+async_client = AsyncOpenAI()
 
 
+@cached_embedding(MODEL)
 def get_embedding(texts: List[str]) -> List[List[float]]:
     """
     Retrieves embeddings for a list of texts using OpenAI's text-embedding-ada-002 model.
@@ -16,7 +22,19 @@ def get_embedding(texts: List[str]) -> List[List[float]]:
 
     """
     response = client.embeddings.create(
-        input=texts, model="text-embedding-ada-002"
+        input=texts, model=MODEL
+    )
+    result = [i.embedding for i in response.data]
+    return result
+
+
+@async_cached_embedding(MODEL)
+async def aget_embedding(texts: List[str]) -> List[List[float]]:
+    """
+    Async version of get_embedding, for use on the API event loop.
+    """
+    response = await async_client.embeddings.create(
+        input=texts, model=MODEL
     )
     result = [i.embedding for i in response.data]
     return result
@@ -0,0 +1,98 @@
+import os
+
+import cv2
+
+from ytb_clone.src.config import FRAME_DEDUP_THRESHOLD, FRAME_FPS
+
+
+def dhash(image, hash_size=8):
+    """
+    Compute the difference hash of an image.
+
+    Parameters:
+    image (ndarray): BGR or grayscale image.
+    hash_size (int): Side of the hash grid, the hash has hash_size ** 2 bits.
+
+    Returns:
+    int: The perceptual hash.
+    """
+    if image.ndim == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+    resized = cv2.resize(
+        image, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA
+    )
+    diff = resized[:, 1:] > resized[:, :-1]
+
+    value = 0
+    for bit in diff.flatten():
+        value = (value << 1) | int(bit)
+
+    return value
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+def dedup_frames(frames, threshold=FRAME_DEDUP_THRESHOLD, interval=1 / FRAME_FPS):
+    """
+    Drop frames that are near-identical to the last kept frame.
+
+    Parameters:
+    frames (Iterable[Tuple[int, ndarray, Any]]): (second, image, data) in time order.
+    threshold (int): Max hamming distance between hashes to count as a duplicate.
+    interval (float): Seconds between two sampled frames, used for the last span.
+
+    Yields:
+    Tuple[int, float, Any]: (start, end, data) of every kept frame, where
+    start/end is the time span the kept frame represents.
+    """
+    kept = None
+    last_second = None
+
+    for second, image, data in frames:
+        frame_hash = dhash(image)
+        last_second = second
+
+        if kept is not None and hamming(kept[1], frame_hash) <= threshold:
+            continue
+
+        if kept is not None:
+            yield kept[0], second, kept[2]
+
+        kept = (second, frame_hash, data)
+
+    # The last kept frame also stands for the duplicates after it
+    if kept is not None:
+        yield kept[0], last_second + interval, kept[2]
+
+
+def frame_second(image_path):
+    file_name = os.path.basename(image_path).split(".")[0]
+    return int(file_name[-4:])
+
+
+def dedup_image_files(image_files, threshold=FRAME_DEDUP_THRESHOLD, interval=1 / FRAME_FPS):
+    """
+    Deduplicate frames extracted by video_to_images.
+
+    Parameters:
+    image_files (List[str]): Paths of frameNNNN images.
+    threshold (int): Max hamming distance between hashes to count as a duplicate.
+    interval (float): Seconds between two sampled frames.
+
+    Returns:
+    List[dict]: One {"data", "start", "end"} entry per kept frame.
+    """
+    image_files = sorted(image_files, key=frame_second)
+
+    frames = (
+        (frame_second(path), cv2.imread(path, cv2.IMREAD_GRAYSCALE), path)
+        for path in image_files
+    )
+
+    return [
+        {"data": path, "start": start, "end": end}
+        for start, end, path in dedup_frames(frames, threshold, interval)
+    ]
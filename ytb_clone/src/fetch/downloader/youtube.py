@@ -1,30 +1,50 @@
 import os
 import cv2
-import json
-import concurrent
+import subprocess
 import tempfile
-
+import threading
+import time
 
 from pytube import YouTube
 from moviepy.editor import VideoFileClip
+from imageio_ffmpeg import get_ffmpeg_exe
 import speech_recognition as sr
-from concurrent.futures import ThreadPoolExecutor
-
-
-def download_video(url, vid_id):
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from ytb_clone.src.config import (
+    AUDIO_CHUNK_DURATION,
+    AUDIO_SAMPLE_RATE,
+    FRAME_FORMAT,
+    FRAME_FPS,
+    FRAME_QUALITY,
+    FRAME_SEGMENTS,
+    TRANSCRIBE_BACKOFF,
+    TRANSCRIBE_QUEUE_DEPTH,
+    TRANSCRIBE_RETRIES,
+    TRANSCRIBE_VAD,
+    THUMBNAIL_QUALITY,
+    THUMBNAIL_SIZE,
+)
+from ytb_clone.src.fetch.transcriber import get_transcriber, is_transient
+from ytb_clone.src.fetch.vad import iter_speech_segments
+from ytb_clone.src.utils import thumbnail_path
+
+
+def download_video(url, vid_id, output_dir=None):
     """
     Download a video from a given url and save it to the output path.
 
     Parameters:
     url (str): The url of the video to download.
-    output_path (str): The path to save the video to.
+    vid_id (str): The video id, used as the file name.
+    output_dir (str): The folder to save the video to (default is a new temporary folder).
 
     Returns:
     dict: A dictionary containing the metadata of the video.
     """
     yt = YouTube(url)
 
-    temp_dir = tempfile.mkdtemp(vid_id)
+    temp_dir = output_dir or tempfile.mkdtemp(vid_id)
 
     metadata = {
         "author": yt.author,
@@ -42,75 +62,215 @@ def download_video(url, vid_id):
     return metadata
 
 
-def extract_frame(video_path, frame_count, frame_rate, output_folder):
-    print(frame_rate)
-    # Open the video file
+def decode_frames(video_path, frame_indices):
+    """
+    Decode the given frames from a video in a single sequential pass.
+
+    The capture is positioned once at the first requested frame, then every
+    following frame is only grabbed (demuxed and decoded, no colour conversion)
+    and retrieved when it is one of the requested indices.
+
+    Parameters:
+    video_path (str): The path to the video file.
+    frame_indices (List[int]): Sorted frame indices to decode.
+
+    Yields:
+    Tuple[int, ndarray]: The frame index and the BGR frame.
+    """
+    if not frame_indices:
+        return
+
     video = cv2.VideoCapture(video_path)
 
-    # Set the frame position
-    video.set(cv2.CAP_PROP_POS_FRAMES, frame_count)
+    # Seek only once, to the start of this range
+    if frame_indices[0] > 0:
+        video.set(cv2.CAP_PROP_POS_FRAMES, frame_indices[0])
 
-    # Read the frame
-    ret, frame = video.read()
+    targets = iter(frame_indices)
+    target = next(targets)
+    position = frame_indices[0]
 
-    start_second = int(frame_count / frame_rate)
-    print(start_second)
+    try:
+        while target is not None:
+            if not video.grab():
+                break
 
-    # Save the frame as an image
-    image_path = os.path.join(output_folder, f"frame{start_second:04d}.png")
+            if position == target:
+                ret, frame = video.retrieve()
 
-    print(image_path)
-    cv2.imwrite(image_path, frame)
+                if ret:
+                    yield position, frame
 
-    # Release the video file
-    video.release()
+                target = next(targets, None)
+
+            position += 1
+    finally:
+        video.release()
 
 
-def video_to_images(video_path, vid_id, fps=0.5):
+def extract_frames(video_path, frame_indices, frame_rate, output_folder):
     """
-    Convert a video to a sequence of images and save them to the output folder.
+    Extract the given frames from a video and save them as PNG images.
 
     Parameters:
     video_path (str): The path to the video file.
+    frame_indices (List[int]): Sorted frame indices to extract.
+    frame_rate (float): Frame rate of the video.
     output_folder (str): The path to the folder to save the images to.
-    fps (float): Frames per second to extract from the video (default is 1).
 
+    Returns:
+    List[str]: Paths of the written images.
+    """
+    image_paths = []
+
+    for position, frame in decode_frames(video_path, frame_indices):
+        start_second = int(position / frame_rate)
+        image_path = os.path.join(output_folder, f"frame{start_second:04d}.png")
+        cv2.imwrite(image_path, frame)
+        image_paths.append(image_path)
+
+    return image_paths
+
+
+def sample_frame_indices(video_path, fps=FRAME_FPS):
+    """
+    Compute the frame indices to sample from a video at the desired fps.
+
+    Returns:
+    Tuple[List[int], float]: The frame indices and the video frame rate.
     """
-    # Open the video file
     video = cv2.VideoCapture(video_path)
 
-    # Get the total number of frames
     total_frames = int(video.get(cv2.CAP_PROP_FRAME_COUNT))
-
     frame_rate = video.get(cv2.CAP_PROP_FPS)
 
-    print(frame_rate)
+    video.release()
+
+    step = max(1, int(frame_rate / fps))
+
+    return list(range(0, total_frames, step)), frame_rate
+
+
+def iter_frames(video_path, fps=FRAME_FPS):
+    """
+    Stream sampled frames of a video without writing them to disk.
+
+    Parameters:
+    video_path (str): The path to the video file.
+    fps (float): Frames per second to extract from the video (default is 0.5).
+
+    Yields:
+    Tuple[int, ndarray]: The second of the frame and the BGR frame.
+    """
+    frame_indices, frame_rate = sample_frame_indices(video_path, fps)
+
+    for position, frame in decode_frames(video_path, frame_indices):
+        yield int(position / frame_rate), frame
+
 
-    # Calculate the frame indices to extract based on the desired fps
-    frame_indices = [
-        int(frame_number)
-        for frame_number in range(0, total_frames, int(frame_rate / fps))
+class FrameWriter:
+    """
+    Persist frames to disk in the background while the caller keeps decoding.
+    """
+
+    def __init__(self, output_folder, fmt=FRAME_FORMAT, quality=FRAME_QUALITY):
+        self.output_folder = output_folder
+        self.fmt = fmt
+        self.params = []
+
+        if fmt in ("jpg", "jpeg"):
+            self.params = [cv2.IMWRITE_JPEG_QUALITY, quality]
+        elif fmt == "webp":
+            self.params = [cv2.IMWRITE_WEBP_QUALITY, quality]
+
+        os.makedirs(output_folder, exist_ok=True)
+
+        # cv2.imwrite releases the GIL, a couple of threads is enough
+        self.executor = ThreadPoolExecutor(max_workers=2)
+        self.futures = []
+
+    def write(self, second, frame):
+        image_path = os.path.join(
+            self.output_folder, f"frame{second:04d}.{self.fmt}"
+        )
+        self.futures.append(self.executor.submit(self._write, image_path, frame))
+
+        return image_path
+
+    def _write(self, image_path, frame):
+        cv2.imwrite(image_path, frame, self.params)
+
+        # The thumbnail sent to the vision model, made while the frame is in memory
+        height, width = frame.shape[:2]
+        scale = min(1.0, THUMBNAIL_SIZE / max(height, width))
+        thumbnail = cv2.resize(
+            frame,
+            (round(width * scale), round(height * scale)),
+            interpolation=cv2.INTER_AREA,
+        )
+
+        output_path = thumbnail_path(image_path)
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        cv2.imwrite(
+            output_path, thumbnail, [cv2.IMWRITE_JPEG_QUALITY, THUMBNAIL_QUALITY]
+        )
+
+    def close(self):
+        for future in self.futures:
+            future.result()
+
+        self.executor.shutdown()
+
+
+def split_segments(frame_indices, segments):
+    """
+    Split frame indices into contiguous time ranges, one per worker.
+    """
+    # Containers that report no frames have nothing to split
+    if not frame_indices:
+        return []
+
+    segments = max(1, min(segments, len(frame_indices)))
+    size = -(-len(frame_indices) // segments)
+
+    return [
+        frame_indices[i:i + size] for i in range(0, len(frame_indices), size)
     ]
 
+
+def video_to_images(video_path, vid_id, fps=FRAME_FPS, segments=FRAME_SEGMENTS):
+    """
+    Convert a video to a sequence of images and save them to the output folder.
+
+    Parameters:
+    video_path (str): The path to the video file.
+    vid_id (str): The video id, images are saved to data/images/{vid_id}.
+    fps (float): Frames per second to extract from the video (default is 0.5).
+    segments (int): Number of time ranges decoded in parallel processes (default is 1).
+
+    """
+    frame_indices, frame_rate = sample_frame_indices(video_path, fps)
+
     output_path = f"data/images/{vid_id}"
 
     # Create the output folder if it doesn't exist
     os.makedirs(output_path, exist_ok=True)
 
-    # Initialize thread pool executor
-    executor = ThreadPoolExecutor()
+    if segments <= 1:
+        extract_frames(video_path, frame_indices, frame_rate, output_path)
+        return output_path
 
-    # Extract frames in parallel
-    for frame_count in frame_indices:
-        executor.submit(
-            extract_frame, video_path, frame_count, frame_rate, output_path
-        )
+    # Each segment decodes its own time range once
+    with ProcessPoolExecutor(max_workers=segments) as executor:
+        futures = [
+            executor.submit(
+                extract_frames, video_path, chunk, frame_rate, output_path
+            )
+            for chunk in split_segments(frame_indices, segments)
+        ]
 
-    # Shutdown the executor
-    executor.shutdown()
-
-    # Release the video file
-    video.release()
+        for future in futures:
+            future.result()
 
     return output_path
 
@@ -135,108 +295,249 @@ def video_to_audio(video_path, vid_id):
     return output_audio_path
 
 
-def process_chunk(
-    chunk_id, start_time, end_time, audio_chunk, recognizer, vid_id
-):
+def process_chunk(chunk_id, start_time, end_time, audio_chunk, transcriber):
     """
-    Process an individual audio chunk and save the transcription along with its start and end times to a JSON file.
+    Transcribe an individual audio chunk, retrying transient failures
+    (network, timeouts, rate limits, server errors) with exponential backoff.
+    Other errors are raised right away.
 
     Parameters:
     chunk_id (int): The identifier for the audio chunk.
     start_time (int): The start time of the chunk in seconds.
     end_time (int): The end time of the chunk in seconds.
     audio_chunk (AudioData): The chunk of audio data to be transcribed.
-    recognizer (Recognizer): The speech recognition recognizer instance.
+    transcriber: The transcription backend, see fetch/transcriber.py.
+
+    Returns:
+    dict: The transcription with its start and end times, None if the chunk has no speech.
     """
-    try:
-        # Recognize the speech in the chunk
-        text = recognizer.recognize_whisper_api(audio_chunk)
-        # Save the transcription to a JSON file
-        with open(f"data/transcribes/{vid_id}/{chunk_id}.json", "w") as file:
-            json.dump(
-                {"start": start_time, "end": end_time, "text": text}, file
+    for attempt in range(TRANSCRIBE_RETRIES + 1):
+        try:
+            # Recognize the speech in the chunk
+            text = transcriber.transcribe(audio_chunk)
+            return {"start": start_time, "end": end_time, "text": text}
+        except sr.UnknownValueError:
+            print(
+                f"Chunk {chunk_id}: Speech recognition could not understand the audio."
             )
-        # print(f"Chunk {chunk_id} processed successfully.")
-    except sr.UnknownValueError:
-        print(
-            f"Chunk {chunk_id}: Speech recognition could not understand the audio."
-        )
-    except sr.RequestError as e:
-        print(f"Chunk {chunk_id}: Could not request results from service; {e}")
+            return None
+        except Exception as e:
+            if not is_transient(e):
+                raise
+
+            if attempt == TRANSCRIBE_RETRIES:
+                raise RuntimeError(
+                    f"Chunk {chunk_id} ({start_time}s-{end_time}s) failed "
+                    f"after {attempt + 1} attempts"
+                ) from e
+
+            delay = TRANSCRIBE_BACKOFF * 2**attempt
+            print(f"Chunk {chunk_id}: {e}, retrying in {delay}s")
+            time.sleep(delay)
 
 
-def audio_to_text(audio_path, vid_id):
+def iter_wav_chunks(audio_path, chunk_duration=AUDIO_CHUNK_DURATION):
     """
-    Convert audio to text using the SpeechRecognition library by processing the audio in chunks.
-    Each chunk is processed in a separate thread, and the results, including start and end times, are saved to individual JSON files.
-    These are then merged to get the final transcription in a single JSON file, and individual chunk files are removed.
+    Read a WAV file in fixed-size chunks.
 
-    Parameters:
-    audio_path (str): The path to the audio file.
+    Yields:
+    Tuple[int, int, AudioData]: Start time, end time and the audio chunk.
     """
     recognizer = sr.Recognizer()
-    audio = sr.AudioFile(audio_path)
-    os.makedirs(f"data/transcribes/{vid_id}", exist_ok=True)
-    chunk_duration = 30  # Duration of each chunk in seconds
-
-    with audio as source, concurrent.futures.ThreadPoolExecutor() as executor:
-        futures = []
-        chunk_id = 0
-        start_time = 0
+    start_time = 0
 
+    with sr.AudioFile(audio_path) as source:
         while True:
             try:
                 # Record a chunk of the audio data
-                audio_chunk = recognizer.record(
-                    source, duration=chunk_duration
-                )
+                audio_chunk = recognizer.record(source, duration=chunk_duration)
+            except EOFError:
+                # Reached the end of the audio file
+                break
+
+            if len(audio_chunk.frame_data) == 0:
+                break
+
+            yield start_time, start_time + chunk_duration, audio_chunk
+            start_time += chunk_duration
+
+
+def iter_video_pcm(video_path, sample_rate=AUDIO_SAMPLE_RATE, block_size=1 << 16):
+    """
+    Decode the soundtrack of a video into 16-bit mono PCM blocks.
+
+    ffmpeg resamples to `sample_rate` mono and writes to a pipe, so no
+    intermediate WAV is written.
+
+    Yields:
+    bytes: Raw PCM blocks of at most `block_size` bytes.
+
+    Raises:
+    RuntimeError: ffmpeg failed, with its error output. An unreadable file
+    must not pass for a silent one.
+    """
+    command = [
+        get_ffmpeg_exe(),
+        "-nostdin",
+        "-loglevel",
+        "error",
+        "-i",
+        video_path,
+        "-vn",
+        "-ac",
+        "1",
+        "-ar",
+        str(sample_rate),
+        "-f",
+        "s16le",
+        "-",
+    ]
+
+    # A file rather than a pipe, nobody reads stderr while stdout is drained
+    with tempfile.TemporaryFile() as stderr:
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=stderr)
+
+        try:
+            while block := process.stdout.read(block_size):
+                yield block
+
+            process.wait()
+        finally:
+            process.stdout.close()
+            # Still running when the consumer stopped early
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+
+        if process.returncode != 0:
+            stderr.seek(0)
+            raise RuntimeError(
+                f"ffmpeg failed to decode the audio of {video_path} "
+                f"(exit code {process.returncode}): "
+                f"{stderr.read().decode(errors='replace').strip()}"
+            )
+
+
+def iter_video_audio_chunks(
+    video_path,
+    chunk_duration=AUDIO_CHUNK_DURATION,
+    sample_rate=AUDIO_SAMPLE_RATE,
+):
+    """
+    Decode the soundtrack of a video straight into fixed-size chunks, only one
+    chunk is held at a time.
+
+    Yields:
+    Tuple[int, int, AudioData]: Start time, end time and the audio chunk.
+    """
+    sample_width = 2
+    start_time = 0
+
+    chunk_size = chunk_duration * sample_rate * sample_width
+    pcm = iter_video_pcm(video_path, sample_rate, chunk_size)
+
+    for data in pcm:
+        duration = len(data) / (sample_rate * sample_width)
+        end_time = start_time + round(duration)
+
+        yield start_time, end_time, sr.AudioData(data, sample_rate, sample_width)
+        start_time += chunk_duration
 
-                if len(audio_chunk.frame_data) == 0:
+
+def iter_video_speech_chunks(video_path, sample_rate=AUDIO_SAMPLE_RATE):
+    """
+    Decode the soundtrack of a video into speech segments cut at pauses,
+    non-speech stretches are skipped.
+
+    Yields:
+    Tuple[float, float, AudioData]: Start time, end time and the audio chunk.
+    """
+    pcm = iter_video_pcm(video_path, sample_rate)
+
+    for start_time, end_time, data in iter_speech_segments(pcm, sample_rate):
+        yield start_time, end_time, sr.AudioData(data, sample_rate, 2)
+
+
+def transcribe_chunks(chunks):
+    """
+    Transcribe audio chunks in a thread pool, with a bounded number in flight.
+
+    Results are collected from the futures and merged in chunk order. The
+    first chunk that fails stops the submission of further chunks, cancels
+    the queued ones and is raised. Persisting the transcription is up to the
+    caller.
+
+    Parameters:
+    chunks (Iterable[Tuple[int, int, AudioData]]): Start time, end time and audio of every chunk.
+    """
+    transcriber = get_transcriber()
+
+    # Stop decoding while too many chunks wait for a worker
+    slots = threading.BoundedSemaphore(TRANSCRIBE_QUEUE_DEPTH)
+    failed = threading.Event()
+
+    def run(*args):
+        try:
+            return process_chunk(*args)
+        except Exception:
+            failed.set()
+            raise
+        finally:
+            slots.release()
+
+    with ThreadPoolExecutor(max_workers=transcriber.max_workers) as executor:
+        futures = []
+
+        try:
+            for chunk_id, (start_time, end_time, audio_chunk) in enumerate(chunks):
+                slots.acquire()
+
+                # A failed chunk dooms the import, stop decoding and paying for
+                # the rest, its error is raised below
+                if failed.is_set():
                     break
-                end_time = start_time + chunk_duration
+
                 futures.append(
                     executor.submit(
-                        process_chunk,
-                        chunk_id,
-                        start_time,
-                        end_time,
-                        audio_chunk,
-                        recognizer,
-                        vid_id,
+                        run, chunk_id, start_time, end_time, audio_chunk, transcriber
                     )
                 )
-                start_time += chunk_duration
-                chunk_id += 1
 
-            except EOFError:
-                # Reached the end of the audio file
-                break
+            results = [future.result() for future in futures]
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
 
-        # Wait for all threads to complete
-        concurrent.futures.wait(futures)
+    return [result for result in results if result is not None]
 
-    # Merge JSON files into a single JSON file
-    transcriptions = []
-    for i in range(chunk_id):
-        try:
-            with open(f"data/transcribes/{vid_id}/{i}.json", "r") as file:
-                transcriptions.append(json.load(file))
-            # Remove the chunk file after adding its content to the transcriptions list
-            os.remove(f"data/transcribes/{vid_id}/{i}.json")
-        except FileNotFoundError:
-            print(f"Warning: File transcribes/{vid_id}/{i}.json not found.")
 
-    with open(
-        f"data/transcribes/{vid_id}/final_transcription.json", "w"
-    ) as outfile:
-        json.dump(transcriptions, outfile)
+def audio_to_text(audio_path):
+    """
+    Convert audio to text using the SpeechRecognition library by processing the audio in chunks.
 
-    return transcriptions
+    Parameters:
+    audio_path (str): The path to the audio file.
+    """
+    return transcribe_chunks(iter_wav_chunks(audio_path))
 
 
-if __name__ == "__main__":
-    import time
+def video_to_text(video_path):
+    """
+    Transcribe the soundtrack of a video without writing the full WAV to disk.
 
+    Parameters:
+    video_path (str): The path to the video file.
+    """
+    if TRANSCRIBE_VAD:
+        chunks = iter_video_speech_chunks(video_path)
+    else:
+        chunks = iter_video_audio_chunks(video_path)
+
+    return transcribe_chunks(chunks)
+
+
+if __name__ == "__main__":
     start = time.time()
 
     output_meta = download_video(
@@ -258,7 +559,7 @@ if __name__ == "__main__":
     image_cp = time.time()
 
     audio_path = video_to_audio(video_path, "abce1")
-    transcribe = audio_to_text(audio_path, "abce1")
+    transcribe = audio_to_text(audio_path)
 
     print(f"Transcribe time = {time.time() - image_cp}")
 
@@ -0,0 +1,133 @@
+import hashlib
+import threading
+
+import numpy as np
+import speech_recognition as sr
+
+from ytb_clone.src.config import (
+    LOCAL_WHISPER_MODEL,
+    LOCAL_WHISPER_THREADS,
+    LOCAL_WHISPER_WORKERS,
+    TRANSCRIBE_BACKEND,
+    TRANSCRIBE_WORKERS,
+)
+
+
+class WhisperAPITranscriber:
+    """
+    Transcribes with the OpenAI Whisper API, bound by network latency so it
+    runs many requests in parallel threads.
+    """
+
+    def __init__(self, max_workers=TRANSCRIBE_WORKERS):
+        self.recognizer = sr.Recognizer()
+        self.max_workers = max_workers
+
+    def transcribe(self, audio: sr.AudioData) -> str:
+        return self.recognizer.recognize_whisper_api(audio)
+
+
+class LocalWhisperTranscriber:
+    """
+    Transcribes on CPU with a faster-whisper (CTranslate2) int8 model.
+
+    The model is loaded once. CTranslate2 releases the GIL and runs
+    `num_workers` transcriptions concurrently, each with `cpu_threads`
+    threads, so it is driven by that many caller threads.
+    """
+
+    def __init__(
+        self,
+        model_size=LOCAL_WHISPER_MODEL,
+        num_workers=LOCAL_WHISPER_WORKERS,
+        cpu_threads=LOCAL_WHISPER_THREADS,
+    ):
+        try:
+            from faster_whisper import WhisperModel
+        except ImportError as e:
+            raise ImportError(
+                "The local transcription backend needs `pip install faster-whisper`"
+            ) from e
+
+        self.model = WhisperModel(
+            model_size,
+            device="cpu",
+            compute_type="int8",
+            cpu_threads=cpu_threads,
+            num_workers=num_workers,
+        )
+        self.max_workers = num_workers
+
+    def transcribe(self, audio: sr.AudioData) -> str:
+        pcm = audio.get_raw_data(convert_rate=16000, convert_width=2)
+        samples = np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768
+
+        segments, _ = self.model.transcribe(samples, beam_size=1)
+
+        return " ".join(segment.text.strip() for segment in segments)
+
+
+class FakeTranscriber:
+    """
+    Deterministic offline stand-in, the text only depends on the audio bytes.
+    """
+
+    def __init__(self, max_workers=TRANSCRIBE_WORKERS):
+        self.max_workers = max_workers
+
+    def transcribe(self, audio: sr.AudioData) -> str:
+        digest = hashlib.sha1(audio.frame_data).hexdigest()[:8]
+        duration = len(audio.frame_data) / (audio.sample_rate * audio.sample_width)
+
+        return f"chunk {digest} of {duration:.2f} seconds"
+
+
+def is_transient(error: Exception) -> bool:
+    """
+    Whether a failed transcription is worth retrying: network failures,
+    timeouts, rate limits (429) and server errors (5xx). Authentication, bad
+    requests and programming errors fail the same way on every attempt.
+    """
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+
+    # OpenAI API errors carry the HTTP status
+    status = getattr(error, "status_code", None)
+    if isinstance(status, int):
+        return status == 429 or status >= 500
+
+    try:
+        import openai
+    except ImportError:
+        openai = None
+
+    if openai is not None and isinstance(error, openai.APIConnectionError):
+        return True
+
+    # SpeechRecognition reports network failures as "connection failed" and
+    # rejected requests as "request failed"
+    return isinstance(error, sr.RequestError) and "connection failed" in str(error)
+
+
+BACKENDS = {
+    "whisper-api": WhisperAPITranscriber,
+    "local": LocalWhisperTranscriber,
+    "fake": FakeTranscriber,
+}
+
+_transcribers = {}
+_lock = threading.Lock()
+
+
+def get_transcriber(backend=TRANSCRIBE_BACKEND):
+    """
+    Returns the transcriber for a backend, creating it once on first use.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown transcription backend: {backend}")
+
+    with _lock:
+        if backend not in _transcribers:
+            _transcribers[backend] = BACKENDS[backend]()
+
+    return _transcribers[backend]
@@ -0,0 +1,237 @@
+from collections import deque
+
+import numpy as np
+
+from ytb_clone.src.config import (
+    AUDIO_CHUNK_DURATION,
+    AUDIO_SAMPLE_RATE,
+    VAD_CUT_OVERLAP,
+    VAD_MIN_SILENCE,
+    VAD_MIN_SPEECH,
+    VAD_PADDING,
+    VAD_THRESHOLD_DB,
+)
+
+FRAME_MS = 30
+SAMPLE_WIDTH = 2
+
+
+def frame_dbfs(frame):
+    samples = np.frombuffer(frame, dtype=np.int16).astype(np.float32)
+    rms = np.sqrt(np.mean(samples**2))
+
+    return 20 * np.log10(rms / 32768 + 1e-10)
+
+
+def iter_pcm_frames(pcm_blocks, frame_size):
+    """
+    Re-chunk PCM blocks of any size into frames of `frame_size` bytes, a
+    trailing partial frame is dropped.
+    """
+    remainder = b""
+
+    for block in pcm_blocks:
+        block = remainder + block
+        usable = len(block) - len(block) % frame_size
+        remainder = block[usable:]
+
+        for offset in range(0, usable, frame_size):
+            yield block[offset:offset + frame_size]
+
+
+class SpeechRegions:
+    """
+    Per-frame state machine finding speech regions, positions are in frames.
+
+    A region opens on the first speech frame with `pad_frames` of preroll,
+    and closes after `silence_frames` without speech or when it reaches
+    `max_frames`. On such a forced cut the next region starts with the last
+    `overlap_frames` of the cut one.
+    """
+
+    def __init__(
+        self, silence_frames, pad_frames, max_frames, overlap_frames, min_speech_frames
+    ):
+        self.silence_frames = silence_frames
+        self.pad_frames = pad_frames
+        self.max_frames = max_frames
+        # A cut must move forward
+        self.overlap_frames = min(overlap_frames, max_frames // 2)
+        self.min_speech_frames = min_speech_frames
+
+        self.preroll = deque(maxlen=pad_frames)
+        self.region = None
+        self.position = 0
+
+    def feed(self, frame, is_speech):
+        """
+        Returns the region closed by this frame, None otherwise.
+        """
+        closed = None
+
+        if self.region is not None:
+            closed = self._extend(frame, is_speech)
+        elif is_speech:
+            self.region = {
+                "start": self.position - len(self.preroll),
+                "first_speech": self.position,
+                "last_speech": self.position,
+                "frames": [*self.preroll, frame],
+            }
+            self.preroll.clear()
+        else:
+            self.preroll.append(frame)
+
+        self.position += 1
+
+        return closed
+
+    def flush(self):
+        region, self.region = self.region, None
+
+        return self._close(region, self.position) if region else None
+
+    def _extend(self, frame, is_speech):
+        region = self.region
+        region["frames"].append(frame)
+
+        if is_speech:
+            region["last_speech"] = self.position
+
+        if self.position - region["last_speech"] >= self.silence_frames:
+            self.region = None
+            return self._close(region, self.position + 1)
+
+        if len(region["frames"]) >= self.max_frames:
+            return self._cut(region)
+
+        return None
+
+    def _cut(self, region):
+        region["last_speech"] = self.position
+        overlap = region["frames"][len(region["frames"]) - self.overlap_frames:]
+
+        # Speech is counted after the overlap, it was already kept once
+        self.region = None
+        if overlap:
+            self.region = {
+                "start": self.position + 1 - len(overlap),
+                "first_speech": self.position + 1,
+                "last_speech": self.position,
+                "frames": overlap,
+            }
+
+        return self._close(region, self.position + 1)
+
+    def _close(self, region, seen):
+        # Keep `padding` of the trailing silence
+        end = min(region["last_speech"] + 1 + self.pad_frames, seen)
+        speech = region["last_speech"] + 1 - region["first_speech"]
+
+        if speech < self.min_speech_frames:
+            return None
+
+        return {
+            "start": region["start"],
+            "end": end,
+            "data": b"".join(region["frames"][: end - region["start"]]),
+        }
+
+
+class SegmentMerger:
+    """
+    Merges consecutive regions, dropping the silence between them, while the
+    merged segment spans at most `max_frames` of the stream.
+    """
+
+    def __init__(self, max_frames):
+        self.max_frames = max_frames
+        self.segment = None
+
+    def add(self, closed):
+        """
+        Returns the segment completed by this region, None otherwise.
+        """
+        if closed is None:
+            return None
+
+        if self.segment is None:
+            self.segment = closed
+            return None
+
+        # The span, not only the audio, bounds the timestamps of the text
+        if closed["end"] - self.segment["start"] > self.max_frames:
+            done, self.segment = self.segment, closed
+            return done
+
+        self.segment = {
+            "start": self.segment["start"],
+            "end": closed["end"],
+            "data": self.segment["data"] + closed["data"],
+        }
+        return None
+
+
+def iter_speech_segments(
+    pcm_blocks,
+    sample_rate=AUDIO_SAMPLE_RATE,
+    target_duration=AUDIO_CHUNK_DURATION,
+    threshold_db=VAD_THRESHOLD_DB,
+    min_silence=VAD_MIN_SILENCE,
+    min_speech=VAD_MIN_SPEECH,
+    padding=VAD_PADDING,
+    cut_overlap=VAD_CUT_OVERLAP,
+):
+    """
+    Segment a 16-bit mono PCM stream into speech segments cut at pauses.
+
+    Speech regions are found with an energy threshold on 30 ms frames and
+    closed after `min_silence` seconds of non-speech. Regions shorter than
+    `min_speech` are dropped, the rest are padded and merged, dropping the
+    silence in between, while the merged segment spans at most
+    `target_duration` seconds. A region that is longer than `target_duration`
+    on its own is cut there, and the next segment repeats the last
+    `cut_overlap` seconds so words on the cut are not lost.
+
+    Parameters:
+    pcm_blocks (Iterable[bytes]): Raw PCM blocks of any size, in order.
+    sample_rate (int): Sample rate of the PCM stream.
+    target_duration (float): Max time span of a segment in seconds.
+    threshold_db (float): Frames louder than this (dBFS) count as speech.
+    min_silence (float): Pause length in seconds that ends a speech region.
+    min_speech (float): Speech regions shorter than this are dropped.
+    padding (float): Seconds of audio kept around each speech region.
+    cut_overlap (float): Seconds repeated after a cut without a pause.
+
+    Yields:
+    Tuple[float, float, bytes]: Start time, end time and PCM of every segment.
+    """
+    frame_size = int(sample_rate * FRAME_MS / 1000) * SAMPLE_WIDTH
+    frame_duration = FRAME_MS / 1000
+    max_frames = int(target_duration / frame_duration)
+
+    regions = SpeechRegions(
+        silence_frames=int(min_silence / frame_duration),
+        pad_frames=int(padding / frame_duration),
+        max_frames=max_frames,
+        overlap_frames=int(cut_overlap / frame_duration),
+        min_speech_frames=min_speech / frame_duration,
+    )
+    merger = SegmentMerger(max_frames)
+
+    def emit(done):
+        return (
+            round(done["start"] * frame_duration, 2),
+            round(done["end"] * frame_duration, 2),
+            done["data"],
+        )
+
+    for frame in iter_pcm_frames(pcm_blocks, frame_size):
+        if done := merger.add(regions.feed(frame, frame_dbfs(frame) > threshold_db)):
+            yield emit(done)
+
+    if done := merger.add(regions.flush()):
+        yield emit(done)
+
+    if merger.segment is not None:
+        yield emit(merger.segment)
@@ -0,0 +1,183 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from ytb_clone.src.config import (
+    ANSWER_CACHE_DB,
+    ANSWER_CACHE_SIZE,
+    ANSWER_CACHE_THRESHOLD,
+    ANSWER_CACHE_TTL,
+)
+from ytb_clone.src.database.sqlite import closing_commit
+
+
+class AnswerCache:
+    """
+    Final answers keyed by video and question embedding.
+
+    A question hits when the cosine similarity of its embedding with a cached
+    question of the same video reaches `threshold`. Entries expire after `ttl`
+    seconds, the least recently used ones are evicted past `max_size`, and
+    they are optionally persisted to SQLite.
+    """
+
+    def __init__(
+        self,
+        max_size=ANSWER_CACHE_SIZE,
+        ttl=ANSWER_CACHE_TTL,
+        threshold=ANSWER_CACHE_THRESHOLD,
+        path=ANSWER_CACHE_DB,
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.threshold = threshold
+        self.path = path
+
+        # key -> (video_id, normalised vector, answer, created)
+        self.lru = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+            with self.connect() as conn:
+                conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS answers (
+                        key TEXT PRIMARY KEY,
+                        video_id TEXT NOT NULL,
+                        vector BLOB NOT NULL,
+                        answer TEXT NOT NULL,
+                        created REAL NOT NULL
+                    )
+                    """
+                )
+                conn.execute(
+                    "DELETE FROM answers WHERE created < ?", (time.time() - ttl,)
+                )
+                rows = conn.execute(
+                    "SELECT key, video_id, vector, answer, created FROM answers "
+                    "ORDER BY created DESC LIMIT ?",
+                    (max_size,),
+                ).fetchall()
+
+            for key, video_id, vector, answer, created in reversed(rows):
+                self.lru[key] = (
+                    video_id,
+                    np.frombuffer(vector, dtype=np.float32),
+                    answer,
+                    created,
+                )
+
+    def connect(self):
+        return closing_commit(sqlite3.connect(self.path, timeout=30))
+
+    @staticmethod
+    def key(video_id, question):
+        return hashlib.sha256(f"{video_id}\n{question}".encode()).hexdigest()
+
+    @staticmethod
+    def normalise(embedding):
+        vector = np.asarray(embedding, dtype=np.float32)
+        return vector / max(np.linalg.norm(vector), 1e-12)
+
+    def _delete(self, keys):
+        if self.path and keys:
+            with self.connect() as conn:
+                conn.executemany("DELETE FROM answers WHERE key = ?", [(k,) for k in keys])
+
+    def get(self, video_id, embedding):
+        """
+        Returns the answer of the most similar cached question of the video,
+        None when none is similar enough.
+        """
+        query = self.normalise(embedding)
+        now = time.time()
+        best_key, best_score, expired = None, self.threshold, []
+
+        with self.lock:
+            for key, (entry_video_id, vector, _, created) in self.lru.items():
+                if entry_video_id != video_id:
+                    continue
+
+                if now - created > self.ttl:
+                    expired.append(key)
+                    continue
+
+                score = float(vector @ query)
+                if score >= best_score:
+                    best_key, best_score = key, score
+
+            for key in expired:
+                del self.lru[key]
+
+            if best_key is None:
+                self.misses += 1
+                answer = None
+            else:
+                self.hits += 1
+                self.lru.move_to_end(best_key)
+                answer = self.lru[best_key][2]
+
+        self._delete(expired)
+
+        return answer
+
+    def put(self, video_id, question, embedding, answer):
+        key = self.key(video_id, question)
+        vector = self.normalise(embedding)
+        created = time.time()
+        evicted = []
+
+        with self.lock:
+            self.lru[key] = (video_id, vector, answer, created)
+            self.lru.move_to_end(key)
+
+            while len(self.lru) > self.max_size:
+                evicted.append(self.lru.popitem(last=False)[0])
+
+        if self.path:
+            with self.connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO answers VALUES (?, ?, ?, ?, ?)",
+                    (key, video_id, vector.tobytes(), answer, created),
+                )
+
+        self._delete(evicted)
+
+    def invalidate(self, video_id):
+        """
+        Drops every answer of a video, its index changed.
+        """
+        with self.lock:
+            for key in [k for k, v in self.lru.items() if v[0] == video_id]:
+                del self.lru[key]
+
+        if self.path:
+            with self.connect() as conn:
+                conn.execute("DELETE FROM answers WHERE video_id = ?", (video_id,))
+
+    def stats(self):
+        with self.lock:
+            return {"size": len(self.lru), "hits": self.hits, "misses": self.misses}
+
+
+_cache = None
+_lock = threading.Lock()
+
+
+def get_answer_cache():
+    global _cache
+
+    with _lock:
+        if _cache is None:
+            _cache = AnswerCache()
+
+    return _cache
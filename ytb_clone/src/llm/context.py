@@ -0,0 +1,199 @@
+import math
+import os
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+import tiktoken
+from PIL import Image
+
+from ytb_clone.src.config import (
+    CONTEXT_SEGMENT_OVERLAP,
+    CONTEXT_TOKEN_BUDGET,
+    THUMBNAIL_SIZE,
+)
+from ytb_clone.src.utils import thumbnail_path
+
+
+@lru_cache(maxsize=1)
+def get_encoding():
+    # Encoding of the gpt-4 family, vision models included. Loaded on first
+    # use, tiktoken downloads it when it is not cached yet
+    return tiktoken.get_encoding("cl100k_base")
+
+
+def count_tokens(text: str) -> int:
+    return len(get_encoding().encode(text))
+
+
+def image_tokens(width: int, height: int) -> int:
+    """
+    Prompt tokens of an image sent with high detail: the image is fitted into
+    2048x2048, its short side scaled down to 768, then every 512px tile costs
+    170 tokens on top of a base of 85.
+
+    Args:
+        width (int): Image width in pixels.
+        height (int): Image height in pixels.
+
+    Returns:
+        int: The estimated token cost.
+    """
+    scale = min(1.0, 2048 / max(width, height))
+    width, height = width * scale, height * scale
+
+    scale = min(1.0, 768 / min(width, height))
+    width, height = width * scale, height * scale
+
+    tiles = math.ceil(width / 512) * math.ceil(height / 512)
+
+    return 85 + 170 * tiles
+
+
+@lru_cache(maxsize=4096)
+def image_size(path, mtime):
+    # mtime is part of the key, a re-import rewrites frames in place.
+    # Only the header is read for the size
+    with Image.open(path) as image:
+        return image.size
+
+
+def frame_tokens(image_path: str) -> int:
+    """
+    Token cost of a frame as sent to the model, which is its thumbnail.
+    Frames without a thumbnail yet are estimated from the frame fitted into
+    THUMBNAIL_SIZE, like the thumbnail will be.
+    """
+    path = thumbnail_path(image_path)
+
+    if not os.path.exists(path):
+        path = image_path
+
+    width, height = image_size(path, os.path.getmtime(path))
+
+    scale = min(1.0, THUMBNAIL_SIZE / max(width, height))
+
+    return image_tokens(round(width * scale), round(height * scale))
+
+
+def overlap_ratio(a: dict, b: dict) -> float:
+    """
+    Overlap of two time ranges as a fraction of the shorter one.
+    """
+    overlap = min(a["end"], b["end"]) - max(a["start"], b["start"])
+    shorter = min(a["end"] - a["start"], b["end"] - b["start"])
+
+    if shorter <= 0:
+        return 1.0 if overlap >= 0 else 0.0
+
+    return max(0.0, overlap) / shorter
+
+
+def dedup_segments(
+    related_texts: Dict[str, dict], threshold: float = CONTEXT_SEGMENT_OVERLAP
+) -> Dict[str, dict]:
+    """
+    Drops segments mostly covered by a better ranked one, their frames are
+    moved to the segment that is kept.
+
+    Args:
+        related_texts (Dict[str, dict]): Segments keyed by text, best first,
+            as returned by join_frames.
+        threshold (float): Overlap (of the shorter segment) above which two
+            segments are duplicates.
+
+    Returns:
+        Dict[str, dict]: The kept segments, in the same order.
+    """
+    kept = {}
+
+    for text, item in related_texts.items():
+        duplicate = next(
+            (
+                kept_text
+                for kept_text, kept_item in kept.items()
+                if overlap_ratio(item, kept_item) >= threshold
+            ),
+            None,
+        )
+
+        if duplicate is None:
+            kept[text] = {**item, "frames": list(item["frames"])}
+            continue
+
+        frames = kept[duplicate]["frames"]
+        frames.extend(i for i in item["frames"] if i not in frames)
+
+    return kept
+
+
+def pack_context(
+    related_texts: Dict[str, dict],
+    alone_images: List[str],
+    render_segment,
+    budget: int = CONTEXT_TOKEN_BUDGET,
+) -> Tuple[Dict[str, dict], List[str], dict]:
+    """
+    Greedily fills a token budget with the best ranked context.
+
+    Segments come in rank order, each one is followed by its frames, then the
+    frames without transcript. An item that does not fit is dropped and
+    packing goes on with the next, smaller ones may still fit. Frames of a
+    dropped segment are dropped with it.
+
+    Args:
+        related_texts (Dict[str, dict]): Segments keyed by text, best first.
+        alone_images (List[str]): Frames without transcript, best first.
+        render_segment: Function (text, item) -> the prompt text of a segment.
+        budget (int): Prompt tokens available for the context.
+
+    Returns:
+        Tuple[Dict[str, dict], List[str], dict]: The packed segments, the
+        packed frames and a report of the tokens used and what was dropped.
+    """
+    related_texts = dedup_segments(related_texts)
+
+    used = 0
+    packed_texts = {}
+    packed_images = []
+    dropped_segments = []
+    dropped_frames = []
+
+    def fits(tokens):
+        nonlocal used
+        if used + tokens > budget:
+            return False
+        used += tokens
+        return True
+
+    for text, item in related_texts.items():
+        if not fits(count_tokens(render_segment(text, item))):
+            dropped_segments.append((item["start"], item["end"]))
+            dropped_frames.extend(item["frames"])
+            continue
+
+        frames = []
+        for frame in item["frames"]:
+            if fits(frame_tokens(frame)):
+                frames.append(frame)
+            else:
+                dropped_frames.append(frame)
+
+        packed_texts[text] = {**item, "frames": frames}
+
+    for frame in alone_images:
+        if fits(frame_tokens(frame)):
+            packed_images.append(frame)
+        else:
+            dropped_frames.append(frame)
+
+    report = {
+        "budget": budget,
+        "used": used,
+        "segments": len(packed_texts),
+        "frames": len(packed_images)
+        + sum(len(item["frames"]) for item in packed_texts.values()),
+        "dropped_segments": dropped_segments,
+        "dropped_frames": dropped_frames,
+    }
+
+    return packed_texts, packed_images, report
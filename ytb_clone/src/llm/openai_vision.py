@@ -1,10 +1,14 @@
-from openai import OpenAI
+from openai import AsyncOpenAI
+import asyncio
 import json
+import re
 
-from ytb_clone.src.utils import pil_to_base64, replace_from_pattern_with_youtube_link
+from ytb_clone.src.config import CONTEXT_TOKEN_BUDGET, RESPONSE_MAX_TOKENS
+from ytb_clone.src.llm.context import count_tokens, pack_context
+from ytb_clone.src.utils import frames_to_base64, replace_from_pattern_with_youtube_link
 
 
-client = OpenAI()
+client = AsyncOpenAI()
 
 INIT = """
 You are an Youtube Video Analysis, your ask is answer question based on provided video transcribe and video's images
@@ -17,33 +21,91 @@ Remember to response with time range references with this format:
 Response in markdown also. Response as friendly as you are an people instead of a bot. Do not include any image
 """
 
+FRAMES_HEADER = """
+                       Here are some image frames from this time range:
+                    """
+
+ALONE_FRAMES_HEADER = """
+                       Some other frames without transcribe:
+                    """
+
+
+def segment_text(text, item, video_url):
+    return f"""
+                    Video_URL: {video_url}
+                    Transcribe from second {item["start"]} to second {item["end"]}, content: {text}
+                """
+
+
+async def get_response(
+    related_texts, alone_images, question, video_url, on_complete=None
+):
+    # Token counting and frame encoding read images from disk, keep them off
+    # the event loop
+    text_chat = await asyncio.to_thread(
+        build_packed_chat, related_texts, alone_images, question, video_url
+    )
+
+    response = await client.chat.completions.create(
+        model="gpt-4-vision-preview",
+        messages=[
+            {"role": "system", "content": [{"type": "text", "text": INIT}]},
+            {
+                "role": "user",
+                "content": [
+                    *text_chat,
+                    {"type": "text", "text": question},
+                ],
+            },
+        ],
+        max_tokens=RESPONSE_MAX_TOKENS,
+        stream=True,
+    )
+
+    return stream_response(response, video_url, on_complete)
+
+
+def build_packed_chat(related_texts, alone_images, question, video_url):
+    overhead = sum(
+        count_tokens(text)
+        for text in (INIT, question, FRAMES_HEADER, ALONE_FRAMES_HEADER)
+    )
+
+    related_texts, alone_images, report = pack_context(
+        related_texts,
+        alone_images,
+        lambda text, item: segment_text(text, item, video_url),
+        budget=max(CONTEXT_TOKEN_BUDGET - overhead, 0),
+    )
 
-def get_response(related_texts, alone_images, question, video_url):
+    print(
+        f"Context packed {report['segments']} segments and {report['frames']} frames "
+        f"into {report['used']}/{report['budget']} tokens, dropped "
+        f"{len(report['dropped_segments'])} segments and "
+        f"{len(report['dropped_frames'])} frames"
+    )
+
+    return build_chat(related_texts, alone_images, video_url)
+
+
+def build_chat(related_texts, alone_images, video_url):
     text_chat = []
 
+    # Encode every frame of the prompt at once, misses run in parallel
+    frame_paths = [
+        *(frame for item in related_texts.values() for frame in item["frames"]),
+        *alone_images,
+    ]
+    encoded = dict(zip(frame_paths, frames_to_base64(frame_paths)))
+
     for text in related_texts:
         item = related_texts[text]
-        text_chat.append(
-            {
-                "type": "text",
-                "text": f"""
-                    Video_URL: {video_url}
-                    Transcribe from second {item["start"]} to second {item["end"]}, content: {text}
-                """,
-            }
-        )
+        text_chat.append({"type": "text", "text": segment_text(text, item, video_url)})
 
         if len(related_texts[text]["frames"]) > 0:
-            images = [pil_to_base64(i) for i in related_texts[text]["frames"]]
+            images = [encoded[i] for i in related_texts[text]["frames"]]
 
-            text_chat.append(
-                {
-                    "type": "text",
-                    "text": """
-                       Here are some image frames from this time range:
-                    """,
-                }
-            )
+            text_chat.append({"type": "text", "text": FRAMES_HEADER})
 
             for image in images:
                 text_chat.append(
@@ -53,16 +115,9 @@ def get_response(related_texts, alone_images, question, video_url):
                     }
                 )
 
-    text_chat.append(
-        {
-            "type": "text",
-            "text": """
-                       Some other frames without transcribe:
-                    """,
-        }
-    )
+    text_chat.append({"type": "text", "text": ALONE_FRAMES_HEADER})
 
-    alone_images = [pil_to_base64(i) for i in alone_images]
+    alone_images = [encoded[i] for i in alone_images]
 
     text_chat.extend(
         [
@@ -74,37 +129,25 @@ def get_response(related_texts, alone_images, question, video_url):
         ]
     )
 
-    import json
-
     with open("debug.json", "w") as f:
         json.dump(text_chat, f)
 
-    response = client.chat.completions.create(
-        model="gpt-4-vision-preview",
-        messages=[
-            {"role": "system", "content": [{"type": "text", "text": INIT}]},
-            {
-                "role": "user",
-                "content": [
-                    *text_chat,
-                    {"type": "text", "text": question},
-                ],
-            },
-        ],
-        max_tokens=500,
-        stream=True,
-    )
+    return text_chat
+
 
-    return stream_response(response, video_url)
+def sse_text(text):
+    return "data:" + json.dumps({"text": text, "end": False}) + "\n\n"
 
 
-def stream_response(response, video_url):
+async def stream_response(response, video_url, on_complete=None):
+    """
+    Streams the answer as SSE, `on_complete` gets the full text once the
+    answer has been streamed to the end.
+    """
     text = ""
-    for chunk in response:
+    async for chunk in response:
         if chunk.choices[0].delta.content:
-            yield "data:" + json.dumps(
-                {"text": chunk.choices[0].delta.content, "end": False}
-            ) + "\n\n"
+            yield sse_text(chunk.choices[0].delta.content)
 
         if chunk.choices[0].delta.content:
             text += chunk.choices[0].delta.content
@@ -113,3 +156,14 @@ def stream_response(response, video_url):
     # yield "data:" + json.dumps(
     #     {"text": replace_from_pattern_with_youtube_link(text, video_url), "end": True}
     # ) + "\n\n"
+
+    if on_complete is not None and text:
+        await asyncio.to_thread(on_complete, text)
+
+
+async def replay_response(text):
+    """
+    Streams a cached answer in the events of a live one, word by word.
+    """
+    for word in re.findall(r"\S+\s*|\s+", text):
+        yield sse_text(word)
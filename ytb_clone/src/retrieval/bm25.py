@@ -0,0 +1,131 @@
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter
+from typing import Dict, List, Tuple
+
+from ytb_clone.src.config import BM25_B, BM25_DIR, BM25_K1
+from ytb_clone.src.video_id import video_path
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercased word tokens, numbers and names are kept as they are since they
+    are what dense embeddings tend to miss.
+    """
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class BM25Index:
+    """
+    Okapi BM25 over the transcript segments of one video.
+
+    Documents are segment payloads (start, end, data), the index keeps an
+    inverted list of term frequencies so a query only visits the segments
+    that share a term with it.
+    """
+
+    def __init__(self, documents: List[dict], k1: float = BM25_K1, b: float = BM25_B):
+        self.documents = documents
+        self.k1 = k1
+        self.b = b
+
+        self.lengths = []
+        self.postings: Dict[str, List[Tuple[int, int]]] = {}
+
+        for i, document in enumerate(documents):
+            terms = Counter(tokenize(document["data"]))
+            self.lengths.append(sum(terms.values()))
+
+            for term, frequency in terms.items():
+                self.postings.setdefault(term, []).append((i, frequency))
+
+        self.average_length = sum(self.lengths) / max(len(self.lengths), 1)
+
+        n = len(documents)
+        self.idf = {
+            term: math.log(1 + (n - len(posting) + 0.5) / (len(posting) + 0.5))
+            for term, posting in self.postings.items()
+        }
+
+    def search(self, query: str, limit: int = 5) -> List[Tuple[float, dict]]:
+        """
+        Args:
+            query (str): The question, tokenized like the documents.
+            limit (int): Number of segments to return.
+
+        Returns:
+            List[Tuple[float, dict]]: (score, payload) pairs, best first.
+        """
+        scores = {}
+
+        for term in set(tokenize(query)):
+            for i, frequency in self.postings.get(term, []):
+                norm = 1 - self.b + self.b * self.lengths[i] / self.average_length
+                scores[i] = scores.get(i, 0.0) + self.idf[term] * (
+                    frequency * (self.k1 + 1) / (frequency + self.k1 * norm)
+                )
+
+        best = sorted(scores.items(), key=lambda item: -item[1])[:limit]
+
+        return [(score, self.documents[i]) for i, score in best]
+
+
+def index_path(video_id, index_dir=BM25_DIR):
+    return video_path(index_dir, video_id, ".json")
+
+
+def build_index(transcribes: List[dict], video_id: str, index_dir=BM25_DIR):
+    """
+    Writes the segments of a transcript for the BM25 index of the video, the
+    index itself is rebuilt from them on first search.
+    """
+    documents = [
+        {"start": i["start"], "end": i["end"], "data": i["text"]} for i in transcribes
+    ]
+
+    os.makedirs(index_dir, exist_ok=True)
+    path = index_path(video_id, index_dir)
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(documents, f)
+    os.replace(tmp_path, path)
+
+
+def has_index(video_id, index_dir=BM25_DIR):
+    return os.path.exists(index_path(video_id, index_dir))
+
+
+_indexes = {}
+_lock = threading.Lock()
+
+
+def get_index(video_id, index_dir=BM25_DIR):
+    """
+    The BM25 index of a video, None when it has not been built. Indexes are
+    kept in memory and reloaded when the video is re-imported.
+    """
+    path = index_path(video_id, index_dir)
+
+    try:
+        mtime = os.path.getmtime(path)
+    except FileNotFoundError:
+        return None
+
+    with _lock:
+        cached = _indexes.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+    with open(path) as f:
+        index = BM25Index(json.load(f))
+
+    with _lock:
+        _indexes[path] = (mtime, index)
+
+    return index
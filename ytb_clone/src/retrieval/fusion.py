@@ -0,0 +1,38 @@
+from typing import List
+
+from ytb_clone.src.config import RRF_K
+
+
+def segment_key(payload: dict):
+    return (payload["start"], payload["end"], payload["data"])
+
+
+def reciprocal_rank_fusion(
+    rankings: List[List[dict]], limit: int = 5, k: int = RRF_K
+) -> List[dict]:
+    """
+    Merges ranked lists of segment payloads with reciprocal-rank fusion.
+
+    Each segment scores sum(1 / (k + rank)) over the lists it appears in,
+    so only ranks matter and BM25 and cosine scores need no normalisation.
+
+    Args:
+        rankings (List[List[dict]]): Payloads with start, end and data, best first.
+        limit (int): Number of segments to return.
+        k (int): Damping constant, larger values flatten the head of each list.
+
+    Returns:
+        List[dict]: The fused payloads, best first.
+    """
+    scores = {}
+    payloads = {}
+
+    for ranking in rankings:
+        for rank, payload in enumerate(ranking, start=1):
+            key = segment_key(payload)
+            scores[key] = scores.get(key, 0.0) + 1 / (k + rank)
+            payloads.setdefault(key, payload)
+
+    best = sorted(scores, key=lambda key: -scores[key])[:limit]
+
+    return [payloads[key] for key in best]
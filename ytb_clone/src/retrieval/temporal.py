@@ -0,0 +1,122 @@
+import heapq
+from typing import Dict, List, Tuple
+
+from ytb_clone.src.config import QUERY_JOIN_TOLERANCE
+
+
+def join_frames(
+    segments: List[dict], frames: List[dict], tolerance: float = QUERY_JOIN_TOLERANCE
+) -> Tuple[Dict[str, dict], List[str]]:
+    """
+    Assigns frames to the transcript segments whose time range they overlap.
+
+    A frame belongs to a segment when
+    frame.start <= segment.end + tolerance and segment.start - tolerance <= frame.end.
+    Overlap rather than containment, since a deduplicated frame spans the
+    whole run of similar frames and can last longer than any segment.
+    Segment and frame starts are swept in time order, each side keeping a heap
+    of the intervals still open. Intervals ending before the current start are
+    pruned first, so every open interval left overlaps the one starting and
+    the join runs in O((n + m) log(n + m)) plus the number of matches.
+
+    Args:
+        segments (List[dict]): Transcript payloads with start, end and data (the text).
+        frames (List[dict]): Frame payloads with start, end and data (the image path).
+        tolerance (float): Seconds a segment is widened by on both sides.
+
+    Returns:
+        Tuple[Dict[str, dict], List[str]]: Segments keyed by text with their
+        start, end and frames, in input order, and the frames that belong to
+        no segment.
+
+    """
+    merged = {}
+    for segment in segments:
+        merged.setdefault(
+            segment["data"],
+            {"start": segment["start"], "end": segment["end"], "frames": []},
+        )
+
+    # (start, end, kind, index), kind 0 is a segment and 1 a frame
+    intervals = [
+        (segment["start"] - tolerance, segment["end"] + tolerance, 0, i)
+        for i, segment in enumerate(segments)
+    ] + [(frame["start"], frame["end"], 1, i) for i, frame in enumerate(frames)]
+    intervals.sort()
+
+    open_intervals = ([], [])  # per kind, heaps of (end, index)
+    assigned = set()
+    added = [set() for _ in segments]
+
+    def match(segment_index, frame_index):
+        frame = frames[frame_index]
+        if frame["data"] not in added[segment_index]:
+            added[segment_index].add(frame["data"])
+            merged[segments[segment_index]["data"]]["frames"].append(
+                (frame["start"], frame["data"])
+            )
+            assigned.add(frame["data"])
+
+    for start, end, kind, index in intervals:
+        # Starts come in order, an interval ending before this start cannot
+        # overlap any later one either
+        for heap in open_intervals:
+            while heap and heap[0][0] < start:
+                heapq.heappop(heap)
+
+        for _, other in open_intervals[1 - kind]:
+            if kind == 0:
+                match(index, other)
+            else:
+                match(other, index)
+
+        heapq.heappush(open_intervals[kind], (end, index))
+
+    for item in merged.values():
+        item["frames"] = [data for _, data in sorted(item["frames"])]
+
+    unassigned = list(
+        dict.fromkeys(f["data"] for f in frames if f["data"] not in assigned)
+    )
+
+    return merged, unassigned
+
+
+if __name__ == "__main__":
+    import random
+    import time
+
+    def naive(segments, frames):
+        merged = {}
+        added = []
+        for item in segments:
+            merged[item["data"]] = {
+                "start": item["start"],
+                "end": item["end"],
+                "frames": [],
+            }
+            for frame in frames:
+                if frame["start"] <= item["end"] and item["start"] <= frame["end"]:
+                    merged[item["data"]]["frames"].append(frame["data"])
+                    added.append(frame["data"])
+        return merged, [f["data"] for f in frames if f["data"] not in added]
+
+    for n in (100, 1000, 5000):
+        segments = [
+            {"start": i * 30, "end": i * 30 + 30, "data": f"text {i}"}
+            for i in range(n)
+        ]
+        frames = [
+            {"start": s, "end": s + 2, "data": f"frame{s:06d}"}
+            for s in random.sample(range(n * 30), n)
+        ]
+
+        start = time.time()
+        naive(segments, frames)
+        naive_time = time.time() - start
+
+        start = time.time()
+        join_frames(segments, frames)
+        join_time = time.time() - start
+
+        print(f"{n} x {n} hits: nested loop {naive_time:.3f}s, sweep {join_time:.3f}s")
@@ -1,23 +1,95 @@
 from PIL import Image
 import base64
+import os
 import re
-import io
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 
+from ytb_clone.src.config import (
+    THUMBNAIL_CACHE_SIZE,
+    THUMBNAIL_QUALITY,
+    THUMBNAIL_SIZE,
+    THUMBNAIL_WORKERS,
+)
 
-def pil_to_base64(image_path):
-    with open(image_path, "rb") as image_file:
-        image = Image.open(image_file)
-        resized_image = image.resize((512, 512))
+thumbnail_executor = ThreadPoolExecutor(max_workers=THUMBNAIL_WORKERS)
 
-        # Convert the image to PNG format in memory
-        buffered = io.BytesIO()
-        resized_image.save(buffered, format="PNG")
-        image_data = buffered.getvalue()
 
-        # Encode the PNG byte data to Base64
-        base64_data = base64.b64encode(image_data)
+def thumbnail_path(image_path):
+    """
+    Thumbnails live next to the frames: data/images/{id}/frameNNNN.png ->
+    data/thumbnails/{id}/frameNNNN.jpg
+    """
+    folder, file_name = os.path.split(image_path)
+    video_folder = os.path.basename(folder)
+    root = os.path.dirname(os.path.dirname(folder))
 
-        return f"data:image/png;base64,{base64_data.decode('utf-8')}"
+    return os.path.join(
+        root,
+        "thumbnails",
+        video_folder,
+        os.path.splitext(file_name)[0] + ".jpg",
+    )
+
+
+def save_thumbnail(image_path):
+    """
+    Write the JPEG thumbnail of a frame, fitted into THUMBNAIL_SIZE.
+    """
+    output_path = thumbnail_path(image_path)
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+
+    with Image.open(image_path) as image:
+        image = image.convert("RGB")
+        image.thumbnail((THUMBNAIL_SIZE, THUMBNAIL_SIZE))
+        image.save(output_path, format="JPEG", quality=THUMBNAIL_QUALITY)
+
+    return output_path
+
+
+def save_thumbnails(image_paths):
+    return list(thumbnail_executor.map(save_thumbnail, image_paths))
+
+
+def current_thumbnail(image_path):
+    """
+    Path of the thumbnail of a frame, made on the fly for frames imported
+    before thumbnails existed or rewritten since.
+    """
+    path = thumbnail_path(image_path)
+
+    if not os.path.exists(path) or (
+        os.path.exists(image_path)
+        and os.path.getmtime(path) < os.path.getmtime(image_path)
+    ):
+        path = save_thumbnail(image_path)
+
+    return path
+
+
+@lru_cache(maxsize=THUMBNAIL_CACHE_SIZE)
+def file_to_base64(path, mtime):
+    # mtime is part of the key, a re-import rewrites thumbnails in place
+    with open(path, "rb") as image_file:
+        base64_data = base64.b64encode(image_file.read())
+
+    return f"data:image/jpeg;base64,{base64_data.decode('utf-8')}"
+
+
+def frame_to_base64(image_path):
+    """
+    Base64 data URL of a frame thumbnail.
+    """
+    path = current_thumbnail(image_path)
+
+    return file_to_base64(path, os.path.getmtime(path))
+
+
+def frames_to_base64(image_paths):
+    """
+    Encode frames in parallel, popular frames come from the in-memory LRU.
+    """
+    return list(thumbnail_executor.map(frame_to_base64, image_paths))
 
 
 def replace_from_pattern_with_youtube_link(text, youtube_link):
@@ -0,0 +1,26 @@
+import os
+import re
+
+# A YouTube id, or the uuid4 given to videos from other urls
+VIDEO_ID_PATTERN = re.compile(
+    r"[A-Za-z0-9_-]{11}|[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}"
+)
+
+
+def is_video_id(video_id) -> bool:
+    return isinstance(video_id, str) and VIDEO_ID_PATTERN.fullmatch(video_id) is not None
+
+
+def video_path(root, video_id, suffix=""):
+    """
+    Path of the file or folder of a video directly under `root`.
+
+    Video ids end up in paths, an id that would resolve anywhere else (a
+    separator, "..", an absolute path) is rejected with a ValueError.
+    """
+    path = os.path.join(root, f"{video_id}{suffix}")
+
+    if os.path.dirname(os.path.realpath(path)) != os.path.realpath(root):
+        raise ValueError(f"Invalid video id: {video_id!r}")
+
+    return path